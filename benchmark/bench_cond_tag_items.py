@@ -0,0 +1,70 @@
+"""
+ConditionalTagProcessorNode のアイテム列（連結リスト）と Python list による実装を比較する
+
+    python benchmark/bench_cond_tag_items.py
+
+ADD 相当（アンカーの直後への挿入）と REMOVE 相当（複数アイテムの一括削除）を
+交互に繰り返し、最終的な並びが一致することも確認する。
+"""
+import random
+
+from common import load_module, measure
+
+
+def run_list(texts, ops):
+    """旧実装と同じ方式: list.insert と、REMOVE ごとの新しい list の生成"""
+    items = list(texts)
+    for kind, anchor, payload in ops:
+        if kind == 'ADD':
+            insert_at = items.index(anchor) + 1 if anchor in items else len(items)
+            for val in payload:
+                items.insert(insert_at, val)
+                insert_at += 1
+        else:
+            items = [it for it in items if it not in payload]
+    return items
+
+
+def run_item_list(node, texts, ops):
+    items = node._ItemList(texts, lambda t: (node.ITEM_PLAIN, (t,), ()))
+    for kind, anchor, payload in ops:
+        if kind == 'ADD':
+            it = items.first.get(anchor)
+            key = items.last_key() if it is None else it.key
+            items.insert_after(key, [(val, (node.ITEM_PLAIN, (val,), ())) for val in payload])
+        else:
+            items.remove(items.items_with_words(payload))
+    return [it.text for it in items]
+
+
+def generate(n_items, n_ops, seed=0):
+    rng = random.Random(seed)
+    texts = [f"tag{i}" for i in range(n_items)]
+    alive = list(texts)
+    ops = []
+    for i in range(n_ops):
+        if i % 2 == 0:
+            anchor = rng.choice(alive) if alive else ''
+            payload = [f"add{i}_{j}" for j in range(4)]
+            alive.extend(payload)
+            ops.append(('ADD', anchor, payload))
+        else:
+            payload = set(rng.sample(alive, min(4, len(alive))))
+            ops.append(('REMOVE', None, payload))
+    return texts, ops
+
+
+def main():
+    node = load_module("cond_tag_processor").ConditionalTagProcessorNode
+
+    print(f"{'items':>8} {'ops':>6} {'list[s]':>10} {'linked[s]':>10} {'speedup':>8}")
+    for n_items, n_ops in ((300, 200), (3_000, 1_000), (30_000, 2_000)):
+        texts, ops = generate(n_items, n_ops)
+        t_list, r_list = measure(run_list, texts, ops, repeat=1)
+        t_linked, r_linked = measure(run_item_list, node, texts, ops)
+        assert r_list == r_linked, "results differ"
+        print(f"{n_items:>8} {n_ops:>6} {t_list:>10.4f} {t_linked:>10.4f} {t_list / t_linked:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
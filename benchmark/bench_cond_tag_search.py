@@ -0,0 +1,70 @@
+"""
+ConditionalTagProcessorNode の検索式の評価を、旧実装（AST の再帰評価）とコンパイル済みの命令列で比較する
+
+    python benchmark/bench_cond_tag_search.py
+
+深い & / | の検索式を多数含む命令列を、アイテム列に対して繰り返し評価する。
+"""
+import random
+
+from common import load_module, measure
+
+
+def legacy_eval(node, ast, pos_map):
+    """v1.6.0 までの _Word / _And / _Or.eval と同じ評価（比較用）"""
+    if isinstance(ast, node._Word):
+        pos = pos_map.get(ast.w, None)
+        return (pos is not None, pos)
+    lt, lp = legacy_eval(node, ast.l, pos_map)
+    rt, rp = legacy_eval(node, ast.r, pos_map)
+    if isinstance(ast, node._And):
+        ok = lt and rt
+        return (ok, (max(lp, rp) if ok else None))
+    ok = lt or rt
+    if not ok:
+        return (False, None)
+    if lp is None:
+        return (True, rp)
+    if rp is None:
+        return (True, lp)
+    return (True, min(lp, rp))
+
+
+def generate_search(rng, words, depth):
+    if depth == 0:
+        return rng.choice(words)
+    left = generate_search(rng, words, depth - 1)
+    right = generate_search(rng, words, depth - 1)
+    expr = f"{left} {rng.choice('&|')} {right}"
+    return f"({expr})" if rng.random() < 0.5 else expr
+
+
+def main():
+    node = load_module("cond_tag_processor").ConditionalTagProcessorNode
+    rng = random.Random(0)
+    words = [f"tag{i}" for i in range(500)]
+
+    print(f"{'rules':>6} {'depth':>6} {'items':>6} {'legacy[s]':>10} {'compiled[s]':>12} {'speedup':>8}")
+    for n_rules, depth, n_items in ((100, 3, 300), (300, 5, 300), (300, 7, 1_000)):
+        commands = tuple(("REMOVE", generate_search(rng, words, depth), "unused") for _ in range(n_rules))
+        ops, word_ids = node._compile_ops(commands)
+        asts = [node._parse_search(search) for _, search, _ in commands]
+        items = node._ItemList(rng.sample(words, min(n_items, len(words))), lambda t: (node.ITEM_PLAIN, (t,), ()), word_ids)
+
+        # 旧実装は語→位置の dict を受け取る
+        pos_map = {w: it.key for w, it in items.first.items()}
+
+        def run_legacy():
+            return [legacy_eval(node, ast, pos_map)[1] for ast in asts]
+
+        def run_compiled():
+            return [node._eval_search(program, items.first_by_id) for _, (_, program, _) in ops]
+
+        t_legacy, r_legacy = measure(run_legacy)
+        t_new, r_new = measure(run_compiled)
+        assert r_legacy == r_new, "results differ"
+        print(f"{n_rules:>6} {depth:>6} {n_items:>6} {t_legacy:>10.4f} {t_new:>12.4f} {t_legacy / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
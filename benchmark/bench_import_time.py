@@ -0,0 +1,62 @@
+"""
+パッケージの import 時間（ComfyUI 起動時にこのカスタムノードが追加する時間）を計測する
+
+    python benchmark/bench_import_time.py [runs]
+
+毎回新しい Python プロセスで `-X importtime` を使って読み込み、
+パッケージ内の各モジュールの時間（中央値）を表示する。
+- self: モジュール自身の実行時間
+- cumulative: そのモジュールが初めて読み込んだ標準ライブラリなどを含む時間
+  （ComfyUI ではこれらの多くが読み込み済みのため、実際の追加時間は self に近い）
+1回目の実行は .pyc の生成を含むため除外する。
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+from common import PACKAGE_NAME
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+LOADER = f"import sys; sys.path.insert(0, {BENCH_DIR!r}); from common import load_package; load_package()"
+
+
+def import_times():
+    """{モジュール名: (self[us], cumulative[us])} を返す"""
+    # .pyc を使った通常の起動と同じ条件で測る
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", LOADER],
+                          capture_output=True, text=True, check=True, env=env)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == PACKAGE_NAME or name.startswith(PACKAGE_NAME + "."):
+            times[name] = (int(self_us), int(cumulative))
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    import_times()  # .pyc の生成
+
+    samples = {}
+    for _ in range(runs):
+        for name, us in import_times().items():
+            samples.setdefault(name, []).append(us)
+
+    print(f"{'module':<40} {'self[ms]':>10} {'cumulative[ms]':>15}")
+    total_self = 0.0
+    for name, values in sorted(samples.items(), key=lambda kv: -statistics.median(v[1] for v in kv[1])):
+        self_ms = statistics.median(v[0] for v in values) / 1000
+        cumulative_ms = statistics.median(v[1] for v in values) / 1000
+        total_self += self_ms
+        print(f"{name:<40} {self_ms:>10.2f} {cumulative_ms:>15.2f}")
+    print(f"{'total (self)':<40} {total_self:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+改行削除・カンマ区切り正規化の後処理（postprocess_text）を旧実装と比較する
+
+    python benchmark/bench_postprocess.py
+"""
+import random
+import re
+
+from common import load_module, measure
+
+
+def legacy_normalize_commas(text):
+    """v1.6.0 までの実装（比較用）"""
+    text = re.sub(r'(,\s*){2,}', ', ', text)
+    text = re.sub(r'\s*,\s*', ', ', text)
+    text = re.sub(r' BREAK,', '', text)
+    text = re.sub(r'(, )+$', '', text)
+    return text.strip()
+
+
+def legacy_postprocess(text, remove_linefeed, normalize_commas):
+    """v1.6.0 までの実装（比較用）"""
+    if remove_linefeed == "Blank Lines Only":
+        text = "\n".join([line for line in text.split("\n") if line.strip()])
+    elif remove_linefeed == "All":
+        text = text.replace("\n", "")
+    if normalize_commas:
+        text = legacy_normalize_commas(text)
+    return text
+
+
+# (remove_linefeed, normalize_commas)
+CASES = [
+    ("No", True),
+    ("All", True),
+    ("Blank Lines Only", False),
+    ("Blank Lines Only", True),
+]
+
+
+def generate_prompt_text(lines, seed=0):
+    """空行・余分なカンマ・BREAK を含むプロンプト風のテキストを生成"""
+    rng = random.Random(seed)
+    words = ["1girl", "solo", "smile", "blue eyes", "white shirt", "BREAK", "", "masterpiece"]
+    out = []
+    for _ in range(lines):
+        if rng.random() < 0.2:
+            out.append("   ")
+            continue
+        out.append(" ,".join(rng.choice(words) for _ in range(8)) + ", ")
+    return "\n".join(out)
+
+
+def main():
+    nodes = load_module("nodes")
+    postprocess = nodes.postprocess_text
+
+    print(f"{'lines':>8} {'remove_linefeed':>17} {'commas':>6} {'legacy[s]':>10} {'new[s]':>10} {'speedup':>8}")
+    for lines in (1_000, 10_000, 100_000):
+        text = generate_prompt_text(lines)
+        for remove_linefeed, normalize_commas in CASES:
+            t_legacy, r_legacy = measure(legacy_postprocess, text, remove_linefeed, normalize_commas)
+            t_new, r_new = measure(postprocess, text, remove_linefeed, normalize_commas)
+            assert r_legacy == r_new, "results differ"
+            print(f"{lines:>8} {remove_linefeed:>17} {str(normalize_commas):>6}"
+                  f" {t_legacy:>10.4f} {t_new:>10.4f} {t_legacy / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+PromptParser のトークナイザを shlex.split と比較する
+
+    python benchmark/bench_prompt_parser.py
+
+A1111 の "prompts from file" 形式の行を生成し、
+- トークン分割のみ（shlex.split / PromptParser.tokenize）
+- PromptParser.parse 全体（トークナイザを shlex.split に差し替えた場合 / 現在の実装）
+の時間を比較する。結果が一致することも確認する。
+"""
+import random
+import shlex
+
+from common import load_module, measure
+
+
+def generate_lines(count, seed=0):
+    rng = random.Random(seed)
+    words = ["1girl", "solo", "smile", "blue eyes", "white shirt", "(masterpiece:1.2)", "looking at viewer"]
+    lines = []
+    for i in range(count):
+        prompt = ", ".join(rng.choice(words) for _ in range(rng.randint(8, 30)))
+        negative = ", ".join(rng.choice(["lowres", "bad anatomy", "worst quality"]) for _ in range(5))
+        line = f"--prompt {prompt} --negative_prompt {negative} --seed {i} --steps 28 --cfg_scale 6.5 --width 832 --height 1216"
+        if i % 4 == 0:
+            line += ' --sampler_name "DPM++ 2M Karras" --restore_faces true'
+        lines.append(line)
+    return lines
+
+
+def main():
+    nodes = load_module("nodes")
+    parser = nodes.PromptParser
+
+    def tokenize_all(func, lines):
+        return [func(line) for line in lines]
+
+    def parse_all(lines):
+        # メモの効果を除いて解析自体の時間を測る
+        parser.cache_clear()
+        return [dict(parser.parse(line)) for line in lines]
+
+    print(f"{'lines':>7} {'target':>9} {'shlex[s]':>10} {'new[s]':>10} {'speedup':>8}")
+    for count in (1_000, 5_000, 20_000):
+        lines = generate_lines(count)
+
+        t_shlex, r_shlex = measure(tokenize_all, shlex.split, lines)
+        t_new, r_new = measure(tokenize_all, parser.tokenize, lines)
+        assert r_shlex == r_new, "tokens differ"
+        print(f"{count:>7} {'tokenize':>9} {t_shlex:>10.4f} {t_new:>10.4f} {t_shlex / t_new:>7.1f}x")
+
+        original = parser.__dict__["tokenize"]
+        parser.tokenize = staticmethod(shlex.split)
+        try:
+            t_shlex, r_shlex = measure(parse_all, lines)
+        finally:
+            parser.tokenize = original
+        t_new, r_new = measure(parse_all, lines)
+        assert r_shlex == r_new, "parse results differ"
+        print(f"{count:>7} {'parse':>9} {t_shlex:>10.4f} {t_new:>10.4f} {t_shlex / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+RemoveCommentsNode のコメント削除を旧実装（while ループ＋文字列の再構築）と比較する
+
+    python benchmark/bench_remove_comments.py
+"""
+import random
+
+from common import load_module, measure
+
+
+def legacy_remove_comments(text, line_comment, block_comment_start, block_comment_end):
+    """v1.6.0 までの実装（比較用）"""
+    while block_comment_start in text:
+        start = text.find(block_comment_start)
+        end = text.find(block_comment_end)
+        if end == -1:
+            break
+        text = text[:start] + text[end + len(block_comment_end):]
+
+    while line_comment in text:
+        start = text.find(line_comment)
+        end = text.find("\n", start)
+        if end == -1:
+            end = len(text)
+        text = text[:start] + text[end:]
+    return text
+
+
+def generate_wildcard_text(lines, seed=0):
+    """行コメント・ブロックコメントを含むワイルドカードファイル風のテキストを生成"""
+    rng = random.Random(seed)
+    words = ["1girl", "solo", "smile", "blue eyes", "white shirt", "__colors__", "{red|blue|green}"]
+    out = []
+    for i in range(lines):
+        body = ", ".join(rng.choice(words) for _ in range(6))
+        r = rng.random()
+        if r < 0.3:
+            out.append(f"{body} // note {i}")
+        elif r < 0.4:
+            out.append(f"/* disabled {i}\n{body} */ {body}")
+        else:
+            out.append(body)
+    return "\n".join(out)
+
+
+def main():
+    nodes = load_module("nodes")
+    strip = nodes.RemoveCommentsNode.strip_comments
+
+    print(f"{'lines':>8} {'bytes':>10} {'legacy[s]':>10} {'new[s]':>10} {'speedup':>8}")
+    for lines in (1_000, 4_000, 16_000):
+        text = generate_wildcard_text(lines)
+        t_legacy, r_legacy = measure(legacy_remove_comments, text, "//", "/*", "*/", repeat=1)
+        t_new, r_new = measure(strip, text, "//", "/*", "*/")
+        assert r_legacy == r_new, "results differ"
+        print(f"{lines:>8} {len(text):>10} {t_legacy:>10.4f} {t_new:>10.4f} {t_legacy / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+ベンチマーク共通処理
+
+ComfyUI なしでこのカスタムノードのモジュールを読み込めるように、
+リポジトリのルートを任意のパッケージ名で import する。
+"""
+import importlib.util
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PACKAGE_NAME = "text_utility"
+
+
+def load_package():
+    """リポジトリのルートを PACKAGE_NAME パッケージとして読み込む"""
+    if PACKAGE_NAME in sys.modules:
+        return sys.modules[PACKAGE_NAME]
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME, os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_module(name):
+    """パッケージ内のモジュール（例: "nodes"）を返す"""
+    load_package()
+    return importlib.import_module(f"{PACKAGE_NAME}.{name}")
+
+
+def measure(func, *args, repeat=3, **kwargs):
+    """func を repeat 回実行し、最速の実行時間（秒）と戻り値を返す"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
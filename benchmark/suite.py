@@ -0,0 +1,636 @@
+"""
+各ノードの主要な処理をまとめて計測するベンチマークスイート
+
+    python benchmark/suite.py
+    python benchmark/suite.py --sizes 1000,10000 --cases cond_tag,remove_comments
+    python benchmark/suite.py --json results-1.6.0.json
+    python benchmark/suite.py --json results-new.json --compare results-1.6.0.json
+
+ComfyUI・GPU は不要。各ケースはサイズ（アイテム数・行数・レコード数）ごとに合成データを生成し、
+- 実行時間（最速値）とスループット（サイズ / 秒）
+- tracemalloc による最大メモリ使用量（時間の計測とは別に1回実行して測る。入力データ自体は含まない）
+を出力する。キャッシュを持つ処理は、実行のたびにキャッシュを空にしてから計測する。
+--json を指定すると結果を JSON で保存し、--compare で以前の結果との比（旧 / 新）を表示する。
+
+既定のサイズ（1,000〜1,000,000）ですべてのケースを実行すると 10 分程度かかる。
+ワイルドカード処理を行うノード（Process Wildcard など）は、Impact Pack の代わりに
+__name__ と {a|b} だけを展開する簡易版の impact.wildcards（stub_wildcards_process）を使って計測する
+（計測するのはノード側の処理で、Impact Pack の展開速度は含まない）。
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+from common import ROOT, load_module
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# 1回の実行がこの時間（秒）を超えたら、それ以上繰り返さない
+REPEAT_BUDGET = 1.0
+
+WORDS = ["1girl", "solo", "smile", "blue eyes", "white shirt", "looking at viewer", "outdoors", "upper body"]
+
+STUB_WILDCARDS = {
+    "hair": ["long hair", "short hair", "ponytail", "twintails"],
+    "color": ["red", "blue", "green", "white", "black"],
+    "style": ["watercolor", "anime coloring", "sketch"],
+}
+
+
+# ----------------- 合成データ -----------------
+
+def generate_tag(rng):
+    r = rng.random()
+    word = rng.choice(WORDS) if r < 0.5 else f"tag{rng.randrange(1000)}"
+    if r < 0.7:
+        return word
+    if r < 0.8:
+        return f"({word}:1.{rng.randint(0, 9)})"
+    if r < 0.9:
+        return f"({word}, tag{rng.randrange(1000)}:1.2)"
+    return f"[CUT:{word}:tag{rng.randrange(1000)}]"
+
+
+def generate_tags(count, seed=0):
+    rng = random.Random(seed)
+    return ", ".join(generate_tag(rng) for _ in range(count))
+
+
+def generate_rules(count, seed=0):
+    """ADD / REMOVE を交互に含む命令ブロック"""
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        if i % 2:
+            rules.append(f"<ADD:{rng.choice(WORDS)} & tag{rng.randrange(1000)}:added{i}, (extra{i}:1.1)>")
+        else:
+            rules.append(f"<REMOVE:tag{rng.randrange(1000)} | {rng.choice(WORDS)}:tag{rng.randrange(1000)}, tag{rng.randrange(1000)}>")
+    return " ".join(rules)
+
+
+def generate_commented_text(lines, seed=0):
+    """行コメント・ブロックコメントを含むワイルドカードファイル風のテキスト"""
+    rng = random.Random(seed)
+    out = []
+    for i in range(lines):
+        body = ", ".join(rng.choice(WORDS) for _ in range(6))
+        r = rng.random()
+        if r < 0.3:
+            out.append(f"{body} // note {i}")
+        elif r < 0.4:
+            out.append(f"/* disabled {i}\n{body} */ {body},, ")
+        else:
+            out.append(body)
+    return "\n".join(out)
+
+
+def generate_variable_text(lines, seed=0):
+    """10行ごとに変数定義（一部は他の変数を参照）を含み、各行が変数を参照するテキスト"""
+    rng = random.Random(seed)
+    out = ['$base="masterpiece"']
+    for i in range(lines - 1):
+        if i % 10 == 0:
+            ref = ", $base" if i % 20 == 0 else ""
+            out.append(f'$var{i // 10}="{rng.choice(WORDS)}{ref}"')
+        else:
+            out.append(f"{rng.choice(WORDS)}, $var{rng.randrange(i // 10 + 1)}, {rng.choice(WORDS)}")
+    return "\n".join(out)
+
+
+def generate_prompt_lines(lines, seed=0):
+    """A1111 の "prompts from file" 形式の行"""
+    rng = random.Random(seed)
+    out = []
+    for i in range(lines):
+        prompt = ", ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+        line = f"--prompt {prompt} --negative_prompt lowres, bad anatomy --seed {i} --steps 28 --cfg_scale 6.5"
+        if i % 4 == 0:
+            line += ' --sampler_name "DPM++ 2M Karras" --width 832 --height 1216'
+        out.append(line)
+    return "\n".join(out)
+
+
+def generate_wildcard_text(lines, seed=0):
+    """10行ごとに変数定義を含み、各行がワイルドカード（__name__ / {a|b}）と変数を参照するテキスト"""
+    rng = random.Random(seed)
+    names = sorted(STUB_WILDCARDS)
+    out = ['$base="masterpiece, __style__"']
+    for i in range(lines - 1):
+        if i % 10 == 0:
+            out.append(f'$var{i // 10}="{{{rng.choice(WORDS)}|{rng.choice(WORDS)}}}, $base"')
+        else:
+            out.append(f"__{rng.choice(names)}__, $var{rng.randrange(i // 10 + 1)}, {{{rng.choice(WORDS)}|{rng.choice(WORDS)}}}")
+    return "\n".join(out)
+
+
+def write_file(directory, name, text):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    return path
+
+
+# ----------------- ワイルドカード処理の代用 -----------------
+
+STUB_OPTION_PATTERN = re.compile(r"\{([^{}]*)\}")
+STUB_WILDCARD_PATTERN = re.compile(r"__([\w.-]+)__")
+
+
+def stub_wildcards_process(text, seed=None):
+    """impact.wildcards.process の代用（{a|b} と STUB_WILDCARDS の __name__ だけを seed で決定的に展開する）"""
+    rng = random.Random(seed)
+    text = STUB_OPTION_PATTERN.sub(lambda m: rng.choice(m.group(1).split("|")), text)
+    return STUB_WILDCARD_PATTERN.sub(lambda m: rng.choice(STUB_WILDCARDS.get(m.group(1), [m.group(0)])), text)
+
+
+def use_stub_wildcards(nodes):
+    """ノードが Impact Pack の代わりに stub_wildcards_process を使うようにする（Impact Pack がある環境でも条件をそろえる）"""
+    if nodes._impact_wildcards_process is stub_wildcards_process:
+        return
+    package = types.ModuleType("impact")
+    module = types.ModuleType("impact.wildcards")
+    module.process = stub_wildcards_process
+    package.wildcards = module
+    sys.modules["impact"] = package
+    sys.modules["impact.wildcards"] = module
+    nodes._impact_wildcards = None
+    nodes.get_impact_wildcards()
+
+
+# ----------------- ケース -----------------
+#
+# 各ケースは (モジュール, サイズ, 作業ディレクトリ) を受け取って合成データを用意し、
+# 計測対象の処理（引数なしの関数）を返す。データの生成は計測に含まない。
+
+def case_split_top_level(m, size, workdir):
+    node = m["cond"].ConditionalTagProcessorNode
+    text = generate_tags(size)
+    return lambda: node._split_top_level(text)
+
+
+def case_cond_tag(m, size, workdir):
+    node = m["cond"].ConditionalTagProcessorNode
+    text = generate_tags(size) + " " + generate_rules(100)
+
+    def run():
+        node.cache_clear()
+        return node().process(text)
+    return run
+
+
+def case_cond_tag_list(m, size, workdir):
+    """size 件のプロンプト（各 20 タグ）に共通の命令ブロックを適用する"""
+    node = m["cond"].ConditionalTagProcessorListNode
+    rng = random.Random(0)
+    prompts = [", ".join(generate_tag(rng) for _ in range(20)) for _ in range(size)]
+    rules = [generate_rules(20)]
+
+    def run():
+        m["cond"].ConditionalTagProcessorNode.cache_clear()
+        return node().process(prompts, rules, [False], [0])
+    return run
+
+
+def case_load_text_file(m, size, workdir):
+    """キャッシュを空にしてファイルを読み込む"""
+    nodes = m["nodes"]
+    write_file(workdir, "prompts.txt", generate_prompt_lines(size))
+
+    def run():
+        nodes.text_file_cache.clear()
+        return nodes.LoadTextFileNode().load_text(workdir, "prompts.txt")
+    return run
+
+
+def case_load_text_file_cached(m, size, workdir):
+    """変更されていないファイルをキャッシュから読み込む"""
+    nodes = m["nodes"]
+    write_file(workdir, "prompts.txt", generate_prompt_lines(size))
+    nodes.text_file_cache.clear()
+    with contextlib.redirect_stdout(None):
+        nodes.LoadTextFileNode().load_text(workdir, "prompts.txt")
+    return lambda: nodes.LoadTextFileNode().load_text(workdir, "prompts.txt")
+
+
+def case_save_text_file(m, size, workdir):
+    """size 行のテキストで既存のファイルを（一時ファイル経由で）置き換える"""
+    node = m["nodes"].SaveTextFileNode
+    text = generate_prompt_lines(size)
+    write_file(workdir, "saved.txt", "")
+    return lambda: node().save_text(text, workdir, "saved.txt", True)
+
+
+def case_save_text_file_append(m, size, workdir):
+    """size 行を1行ずつ新しいファイルに追記する"""
+    node = m["nodes"].SaveTextFileNode
+    writers = m["file_writer"].append_writers
+    lines = generate_prompt_lines(size).split("\n")
+    run_count = [0]
+
+    def run():
+        run_count[0] += 1
+        name = f"appended{run_count[0]}.txt"
+        saver = node()
+        for line in lines:
+            saver.save_text(line, workdir, name, True, True)
+        writers.close_all()
+    return run
+
+
+def case_remove_comments(m, size, workdir):
+    node = m["nodes"].RemoveCommentsNode
+    text = generate_commented_text(size)
+    return lambda: node().remove_comments(text, "//", "/*", "*/", "No", True)
+
+
+def case_remove_comments_file(m, size, workdir):
+    node = m["nodes"].RemoveCommentsFileNode
+    source = write_file(workdir, "comments.txt", generate_commented_text(size))
+    output = os.path.join(workdir, "comments.out.txt")
+    chunk_size = m["text_stream"].DEFAULT_CHUNK_SIZE
+    return lambda: node().remove_comments(source, output, "//", "/*", "*/", "No", True, chunk_size)
+
+
+def case_postprocess_text(m, size, workdir):
+    nodes = m["nodes"]
+    text = generate_commented_text(size).replace("\n", "\n\n")
+    return lambda: nodes.postprocess_text(text, "Blank Lines Only", True)
+
+
+def case_extract_line(m, size, workdir):
+    """行インデックスを作り直して、中央の行を取り出す"""
+    nodes = m["nodes"]
+    text = generate_prompt_lines(size)
+
+    def run():
+        m["line_index"].line_index_cache.clear()
+        return nodes.StringsFromTextboxNode.extract_line(text, size // 2, "Fixed", 0)
+    return run
+
+
+def case_load_text_line(m, size, workdir):
+    node = m["nodes"].LoadTextLineNode
+    write_file(workdir, "prompts.txt", generate_prompt_lines(size))
+
+    def run():
+        m["line_index"].file_line_index_cache.clear()
+        return node().doit(workdir, "prompts.txt", size // 2, "Fixed", 1, False, 0)
+    return run
+
+
+def case_strings_to_list(m, size, workdir):
+    node = m["nodes"].StringsToListNode
+    text = generate_prompt_lines(size)
+    return lambda: node().doit(text, 2)
+
+
+def case_strings_to_list_window(m, size, workdir):
+    """行インデックスを作り直して、繰り返し後のリストの中央から 1000 件を取り出す"""
+    nodes = m["nodes"]
+    text = generate_prompt_lines(size)
+
+    def run():
+        m["line_index"].line_index_cache.clear()
+        return nodes.StringsToListNode().doit(text, 2, size, 1000)
+    return run
+
+
+def case_prompt_parser(m, size, workdir):
+    parser = m["nodes"].PromptParser
+    lines = generate_prompt_lines(size).split("\n")
+
+    def run():
+        parser.cache_clear()
+        return [parser.parse(line) for line in lines]
+    return run
+
+
+def case_parse_prompt_full(m, size, workdir):
+    node = m["nodes"].ParsePromptFullNode
+    lines = generate_prompt_lines(size).split("\n")
+
+    def run():
+        m["nodes"].PromptParser.cache_clear()
+        parser = node()
+        return [parser.parse(line) for line in lines]
+    return run
+
+
+def case_parse_prompt_custom(m, size, workdir):
+    node = m["nodes"].ParsePromptCustomNode
+    lines = generate_prompt_lines(size).split("\n")
+
+    def run():
+        m["nodes"].PromptParser.cache_clear()
+        parser = node()
+        return [parser.parse(line, "prompt, seed, steps, sampler_name, width, height") for line in lines]
+    return run
+
+
+def case_parse_prompt_batch(m, size, workdir):
+    node = m["nodes"].ParsePromptBatchNode
+    text = generate_prompt_lines(size)
+
+    def run():
+        m["nodes"].PromptParser.cache_clear()
+        return node().parse(text, True, False, 0)
+    return run
+
+
+def case_replace_variables(m, size, workdir):
+    node = m["nodes"].ReplaceVariablesNode
+    text = generate_variable_text(size)
+    return lambda: node.doit(text)
+
+
+def case_replace_variables_file(m, size, workdir):
+    node = m["nodes"].ReplaceVariablesFileNode
+    source = write_file(workdir, "variables.txt", generate_variable_text(size))
+    output = os.path.join(workdir, "variables.out.txt")
+    chunk_size = m["text_stream"].DEFAULT_CHUNK_SIZE
+    return lambda: node.doit(source, output, chunk_size)
+
+
+def case_process_wildcard(m, size, workdir):
+    """size 行のワイルドカードテキスト全体を1回展開する"""
+    nodes = m["nodes"]
+    use_stub_wildcards(nodes)
+    text = generate_wildcard_text(size)
+
+    def run():
+        nodes.wildcard_result_cache.clear()
+        return nodes.ProcessWildcardNode().doit(text, 1)
+    return run
+
+
+def case_prompts_from_textbox(m, size, workdir):
+    """行インデックスを作り直して、中央の行を取り出して展開する"""
+    nodes = m["nodes"]
+    use_stub_wildcards(nodes)
+    text = generate_wildcard_text(size)
+
+    def run():
+        m["line_index"].line_index_cache.clear()
+        nodes.wildcard_result_cache.clear()
+        return nodes.PromptsFromTextboxNode().doit(text, 1, size // 2, "Fixed", 1, 0)
+    return run
+
+
+def case_replace_vars_wildcard(m, size, workdir):
+    nodes = m["nodes"]
+    use_stub_wildcards(nodes)
+    text = generate_wildcard_text(size)
+
+    def run():
+        nodes.wildcard_result_cache.clear()
+        return nodes.ReplaceVariablesAndProcessWildcardNode().doit(text, 1, "Blank Lines Only", True, True, False, 3, True)
+    return run
+
+
+def case_wildcard_seed_sweep(m, size, workdir):
+    """1行のテンプレートを size 個のシードで展開する（プロセスプールは使わない）"""
+    nodes = m["nodes"]
+    use_stub_wildcards(nodes)
+    text = '$subject="1girl, __hair__, {smile|open mouth}"\n$subject, __color__ eyes, {outdoors|indoors}, __style__'
+
+    def run():
+        nodes.wildcard_result_cache.clear()
+        return nodes.ProcessWildcardSeedSweepNode().doit(text, 0, size, True, False, 0)
+    return run
+
+
+def case_save_prompt_log(m, size, workdir):
+    """size 件のレコードを新しいログファイルに追記する"""
+    node = m["nodes"].SavePromptLogNode
+    writers = m["file_writer"].append_writers
+    prompts = generate_prompt_lines(size).split("\n")
+    run_count = [0]
+
+    def run():
+        run_count[0] += 1
+        name = f"log{run_count[0]}.jsonl"
+        saver = node()
+        for i, prompt in enumerate(prompts):
+            saver.save(prompt, workdir, name, "JSONL", i, i + 1)
+        writers.close_all()
+    return run
+
+
+def case_load_prompt_log(m, size, workdir):
+    """size 件のログの行インデックスを作り直して、最後のレコードを読み込む"""
+    node = m["nodes"].LoadPromptLogNode
+    prompt_log = m["prompt_log"]
+    records = (
+        prompt_log.format_record({"prompt": prompt, "seed": i, "line_number": i + 1, "parameters": {}}, "JSONL")
+        for i, prompt in enumerate(generate_prompt_lines(size).split("\n"))
+    )
+    write_file(workdir, "log.jsonl", "".join(records))
+
+    def run():
+        m["line_index"].file_line_index_cache.clear()
+        return node().load(workdir, "log.jsonl", "JSONL", -1)
+    return run
+
+
+# (名前, サイズの単位, ケース, 最大サイズ)
+# 1件あたりの処理が重いケースは、これより大きいサイズを省略する（None は制限なし）
+CASES = (
+    ("split_top_level", "items", case_split_top_level, None),
+    ("cond_tag", "items", case_cond_tag, None),
+    ("cond_tag_list", "prompts", case_cond_tag_list, 100_000),
+    ("load_text_file", "lines", case_load_text_file, None),
+    ("load_text_file_cached", "lines", case_load_text_file_cached, None),
+    ("save_text_file", "lines", case_save_text_file, None),
+    ("save_text_file_append", "lines", case_save_text_file_append, 100_000),
+    ("remove_comments", "lines", case_remove_comments, None),
+    ("remove_comments_file", "lines", case_remove_comments_file, None),
+    ("postprocess_text", "lines", case_postprocess_text, None),
+    ("extract_line", "lines", case_extract_line, None),
+    ("load_text_line", "lines", case_load_text_line, None),
+    ("strings_to_list", "lines", case_strings_to_list, None),
+    ("strings_to_list_window", "lines", case_strings_to_list_window, None),
+    ("prompt_parser", "lines", case_prompt_parser, 100_000),
+    ("parse_prompt_full", "lines", case_parse_prompt_full, 100_000),
+    ("parse_prompt_custom", "lines", case_parse_prompt_custom, 100_000),
+    ("parse_prompt_batch", "lines", case_parse_prompt_batch, 100_000),
+    ("replace_variables", "lines", case_replace_variables, None),
+    ("replace_variables_file", "lines", case_replace_variables_file, None),
+    ("process_wildcard", "lines", case_process_wildcard, None),
+    ("prompts_from_textbox", "lines", case_prompts_from_textbox, None),
+    ("replace_vars_wildcard", "lines", case_replace_vars_wildcard, None),
+    ("wildcard_seed_sweep", "seeds", case_wildcard_seed_sweep, 100_000),
+    ("save_prompt_log", "records", case_save_prompt_log, 100_000),
+    ("load_prompt_log", "records", case_load_prompt_log, None),
+)
+
+
+# ----------------- 計測 -----------------
+
+def quiet(func):
+    """ノードが出力するログ（処理したファイル名など）を表示しない"""
+    def run():
+        with contextlib.redirect_stdout(None):
+            return func()
+    return run
+
+
+def time_case(func, repeat):
+    """最大 repeat 回実行して最速の時間（秒）と実行回数を返す（遅いケースは REPEAT_BUDGET で打ち切る）"""
+    best = None
+    runs = 0
+    total = 0.0
+    while runs < repeat:
+        t0 = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - t0
+        runs += 1
+        total += elapsed
+        if best is None or elapsed < best:
+            best = elapsed
+        if total >= REPEAT_BUDGET:
+            break
+    return best, runs
+
+
+def peak_memory(func):
+    """func の実行中に確保されたメモリの最大値（バイト）"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def load_modules():
+    return {
+        "nodes": load_module("nodes"),
+        "cond": load_module("cond_tag_processor"),
+        "text_stream": load_module("text_stream"),
+        "line_index": load_module("line_index"),
+        "file_writer": load_module("file_writer"),
+        "prompt_log": load_module("prompt_log"),
+    }
+
+
+def project_version():
+    try:
+        with open(os.path.join(ROOT, "pyproject.toml"), encoding='utf-8') as f:
+            for line in f:
+                if line.startswith("version"):
+                    return line.split("=", 1)[1].strip().strip('"')
+    except OSError:
+        pass
+    return None
+
+
+def run_suite(case_names, sizes, repeat, memory):
+    modules = load_modules()
+    for name, unit, case, max_size in CASES:
+        if case_names and name not in case_names:
+            continue
+        for size in sizes:
+            if max_size is not None and size > max_size:
+                continue
+            workdir = tempfile.mkdtemp(prefix="text_utility_bench_")
+            try:
+                func = quiet(case(modules, size, workdir))
+                seconds, runs = time_case(func, repeat)
+                peak = peak_memory(func) if memory else None
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            yield {
+                "case": name,
+                "size": size,
+                "unit": unit,
+                "seconds": seconds,
+                "throughput": size / seconds if seconds > 0 else None,
+                "peak_memory_bytes": peak,
+                "runs": runs,
+            }
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return {(r["case"], r["size"]): r for r in data["results"]}
+
+
+def format_row(result, baseline):
+    peak = result["peak_memory_bytes"]
+    peak_text = "-" if peak is None else f"{peak / (1024 * 1024):.1f}"
+    row = (f"{result['case']:<24} {result['size']:>9} {result['unit']:<8} {result['seconds']:>10.4f} "
+           f"{result['throughput']:>14,.0f} {peak_text:>10}")
+    if baseline is not None:
+        old = baseline.get((result["case"], result["size"]))
+        row += f" {old['seconds'] / result['seconds']:>8.2f}x" if old else f" {'-':>9}"
+    return row
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the hot paths of every node (no ComfyUI required).")
+    ap.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                    help="comma separated sizes (items / lines / records)")
+    ap.add_argument("--cases", default="", help="comma separated case names (default: all)")
+    ap.add_argument("--repeat", type=int, default=3, help="maximum number of timed runs per case")
+    ap.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    ap.add_argument("--json", help="write the results to this JSON file ('-' for stdout)")
+    ap.add_argument("--compare", help="JSON file of an earlier run; prints old/new time ratios")
+    ap.add_argument("--list", action="store_true", help="list the case names and exit")
+    args = ap.parse_args(argv)
+
+    if args.list:
+        for name, unit, _, max_size in CASES:
+            print(f"{name:<24} ({unit}{'' if max_size is None else f', up to {max_size}'})")
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    case_names = {c.strip() for c in args.cases.split(",") if c.strip()}
+    unknown = case_names - {name for name, _, _, _ in CASES}
+    if unknown:
+        ap.error(f"unknown case(s): {', '.join(sorted(unknown))}")
+    baseline = load_baseline(args.compare) if args.compare else None
+
+    # JSON を標準出力に出す場合、表は標準エラー出力に出す
+    log = sys.stderr if args.json == "-" else sys.stdout
+    header = f"{'case':<24} {'size':>9} {'unit':<8} {'time[s]':>10} {'throughput[/s]':>14} {'peak[MiB]':>10}"
+    if baseline is not None:
+        header += f" {'speedup':>9}"
+    print(header, file=log)
+
+    results = []
+    for result in run_suite(case_names, sizes, max(1, args.repeat), not args.no_memory):
+        results.append(result)
+        print(format_row(result, baseline), file=log, flush=True)
+
+    if args.json:
+        report = {
+            "version": project_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "sizes": sizes,
+            "results": results,
+        }
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
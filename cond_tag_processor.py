@@ -1,6 +1,10 @@
 import re
+from functools import lru_cache
+from types import MappingProxyType
 from typing import List, Tuple, Optional
 
+from .process_pool import map_chunks
+
 class ConditionalTagProcessorNode:
     """
     Conditional Tag Processor
@@ -83,79 +87,72 @@ class ConditionalTagProcessorNode:
     CUT_BARE = re.compile(r'^\[CUT\s*:\s*(.*?)\s*:\s*(.*?)\]\s*$')
     CUT_INNER = re.compile(r'^\[CUT\s*:\s*(.*?)\s*:\s*(.*?)\]\s*(?::.*)?$')
 
+    # アイテムの種類（_parse_item の結果の kind）
+    ITEM_PLAIN = 0          # 通常: 語はテキストそのもの
+    ITEM_CUT = 1            # 素の CUT: [CUT:foo:bar]
+    ITEM_PAREN_CUT = 2      # 括弧内 CUT: ([CUT:foo:bar]) / ([CUT:foo:bar]:x)
+    ITEM_PAREN_SINGLE = 3   # 中身が空の括弧: ()
+    ITEM_PAREN = 4          # 括弧内の語（サブ語）: (foo, bar, white:1.0) / (name:val)
+
     @classmethod
-    def _item_words(cls, item: str) -> List[str]:
+    def _parse_item(cls, item: str):
         """
-        アイテムから検索・存在判定用の語を抽出
-        - 通常: そのまま
+        アイテムを (kind, 語のタプル, 括弧内の要素のタプル) に解析する
+        - 通常: (ITEM_PLAIN, (item,), ())
         - CUT: foo
         - 括弧:
             - ([CUT:foo:bar]) / ([CUT:foo:bar]:x) → foo
-            - (foo, bar, white:1.0) → ["foo","bar","white"]
-            - (name:val) → ["name"]
+            - (foo, bar, white:1.0) → ("foo","bar","white")、要素は ("foo","bar","white:1.0")
+            - (name:val) → ("name",)、要素は ("name:val",)
+        要素の重み（:1.0 など）は要素のテキストに含めたまま保持し、出力時もそのまま使う
         """
         t = item.strip()
         # 素の CUT
         m = cls.CUT_BARE.match(t)
         if m:
-            return [m.group(1).strip()]
+            return (cls.ITEM_CUT, (m.group(1).strip(),), ())
         # 括弧
         if t.startswith('(') and t.endswith(')'):
             inner = t[1:-1].strip()
             # 括弧内 CUT（:tail 許容）
             m2 = cls.CUT_INNER.match(inner)
             if m2:
-                return [m2.group(1).strip()]
-            # 括弧内複数語
-            subs = cls._split_top_level(inner)
-            if subs:
-                words = []
-                for seg in subs:
-                    seg = seg.strip()
-                    if not seg:
-                        continue
-                    name = seg.split(':', 1)[0].strip()
-                    words.append(name)
-                if words:
-                    return words
+                return (cls.ITEM_PAREN_CUT, (m2.group(1).strip(),), ())
+            # 括弧内の要素（_split_top_level の結果は strip 済みで空要素を含まない）
+            segs = tuple(cls._split_top_level(inner))
+            if segs:
+                return (cls.ITEM_PAREN, tuple(seg.split(':', 1)[0].strip() for seg in segs), segs)
             # 単一
-            return [inner.split(':', 1)[0].strip()]
+            return (cls.ITEM_PAREN_SINGLE, (inner.split(':', 1)[0].strip(),), ())
         # 通常
-        return [t]
+        return (cls.ITEM_PLAIN, (t,), ())
 
     @classmethod
-    def _remove_from_parenthetical(cls, t: str, targets: set) -> Optional[str]:
+    def _remove_words(cls, items, targets):
         """
-        括弧アイテムから targets を除去。空になれば None（=アイテムごと削除）
-        CUT が中身なら語一致で None
+        targets の語を含むアイテムから targets の語を削除する
+        - 括弧内の語以外（通常 / CUT / 括弧内 CUT）: 語が targets にあればアイテムごと削除
+        - 括弧内の語: 該当する要素だけを削除し、空になればアイテムごと削除
         """
-        inner = t[1:-1].strip()
-
-        # CUT in () → 語一致なら全削除
-        m2 = cls.CUT_INNER.match(inner)
-        if m2:
-            word = m2.group(1).strip()
-            return None if word in targets else t
-
-        # 複数語の可能性
-        subs = cls._split_top_level(inner)
-        if subs:
-            kept = []
-            for seg in subs:
-                seg_trim = seg.strip()
-                if not seg_trim:
-                    continue
-                word = seg_trim.split(':', 1)[0].strip()
-                if word not in targets:
-                    kept.append(seg_trim)
-            if kept:
-                return '(' + ', '.join(kept) + ')'
+        removed = []
+        for it in items.items_with_words(targets):
+            if it.kind != cls.ITEM_PAREN:
+                # 語は1つだけなので、それが targets にある
+                removed.append(it)
+                continue
+
+            kept = [i for i, w in enumerate(it.words) if w not in targets]
+            if not kept:
+                removed.append(it)
+                continue
+            segs = tuple(it.segs[i] for i in kept)
+            if segs[0].startswith('[CUT'):
+                # 残りが括弧内 CUT として解釈される場合があるので、テキストから解析し直す
+                items.replace(it, '(' + ', '.join(segs) + ')')
             else:
-                return None
+                items.update(it, tuple(it.words[i] for i in kept), segs)
 
-        # 単一
-        base = inner.split(':', 1)[0].strip()
-        return None if base in targets else t
+        items.remove(removed)
 
     # -------- search expression parser (left-assoc &, |; () grouping) --------
 
@@ -184,28 +181,104 @@ class ConditionalTagProcessorNode:
     class _Node: ...
     class _Word(_Node):
         def __init__(self, w): self.w = w
-        def eval(self, pos_map):
-            pos = pos_map.get(self.w, None)
-            return (pos is not None, pos)
     class _And(_Node):
         def __init__(self, l, r): self.l, self.r = l, r
-        def eval(self, pos_map):
-            lt, lp = self.l.eval(pos_map)
-            rt, rp = self.r.eval(pos_map)
-            ok = lt and rt
-            return (ok, (max(lp, rp) if ok else None))
     class _Or(_Node):
         def __init__(self, l, r): self.l, self.r = l, r
-        def eval(self, pos_map):
-            lt, lp = self.l.eval(pos_map)
-            rt, rp = self.r.eval(pos_map)
-            ok = lt or rt
-            if not ok: return (False, None)
-            if lp is None: return (True, rp)
-            if rp is None: return (True, lp)
-            return (True, min(lp, rp))
+
+    # -------- search expression compiler (flat program over interned word ids) --------
+    #
+    # 検索式は命令列ごとに一度だけ逆ポーランド記法の命令列（タプル）に変換する。
+    # 語は命令列全体で整数 ID に置き換え（intern）、評価は「ID→その語が最初に出現するアイテム」の
+    # リスト（_ItemList.first_by_id）を引くだけで行う（再帰・文字列のハッシュ計算なし）。
+    # 評価結果は最初の出現位置（アイテムの key）で、一致しなければ None:
+    #   - 語: その語が最初に出現する位置
+    #   - A & B: 両方一致すれば max(A, B)
+    #   - A | B: 一致した方の位置（両方なら min(A, B)）
+
+    OP_AND = -1
+    OP_OR = -2
+
+    # 命令列の形式
+    PROG_WORD = 0   # 単語のみ: payload = 語 ID
+    PROG_ALL = 1    # & だけの連なり: payload = 語 ID のタプル
+    PROG_ANY = 2    # | だけの連なり: payload = 語 ID のタプル
+    PROG_RPN = 3    # それ以外: payload = 逆ポーランド記法の命令列（語 ID >= 0 / OP_AND / OP_OR）
+
+    @classmethod
+    def _compile_search(cls, ast, word_ids: dict):
+        """AST を (形式, payload) に変換する。word_ids に未登録の語は新しい ID を割り当てる"""
+        code = []
+        ops_used = set()
+        stack = [ast]
+        # 後順（左 → 右 → 演算子）で命令列を作る（再帰を使わない）
+        while stack:
+            node = stack.pop()
+            if isinstance(node, int):
+                code.append(node)
+                continue
+            if isinstance(node, cls._Word):
+                code.append(word_ids.setdefault(node.w, len(word_ids)))
+                continue
+            op = cls.OP_AND if isinstance(node, cls._And) else cls.OP_OR
+            ops_used.add(op)
+            stack.extend((op, node.r, node.l))
+
+        if len(code) == 1:
+            return (cls.PROG_WORD, code[0])
+        # 左結合の a & b & c（右辺がすべて単語）は ID の列として評価する
+        words = tuple(c for c in code if c >= 0)
+        if len(ops_used) == 1 and code == [words[0]] + [x for w in words[1:] for x in (w, next(iter(ops_used)))]:
+            return (cls.PROG_ALL if cls.OP_AND in ops_used else cls.PROG_ANY, words)
+        return (cls.PROG_RPN, tuple(code))
+
+    @classmethod
+    def _eval_search(cls, program, first_by_id):
+        """コンパイル済みの検索式を評価し、位置（key）または None を返す"""
+        mode, payload = program
+        if mode == cls.PROG_WORD:
+            it = first_by_id[payload]
+            return None if it is None else it.key
+
+        if mode == cls.PROG_ALL:
+            pos = 0
+            for wid in payload:
+                it = first_by_id[wid]
+                if it is None:
+                    return None
+                if it.key > pos:
+                    pos = it.key
+            return pos
+
+        if mode == cls.PROG_ANY:
+            pos = None
+            for wid in payload:
+                it = first_by_id[wid]
+                if it is not None and (pos is None or it.key < pos):
+                    pos = it.key
+            return pos
+
+        stack = []
+        push = stack.append
+        for op in payload:
+            if op >= 0:
+                it = first_by_id[op]
+                push(None if it is None else it.key)
+                continue
+            r = stack.pop()
+            l = stack[-1]
+            if op == cls.OP_AND:
+                stack[-1] = None if l is None or r is None else (l if l > r else r)
+            elif l is None or (r is not None and r < l):
+                stack[-1] = r
+        return stack[0]
+
+    # 検索式・命令列のキャッシュサイズ（LRU）
+    SEARCH_CACHE_SIZE = 1024
+    OPS_CACHE_SIZE = 256
 
     @classmethod
+    @lru_cache(maxsize=SEARCH_CACHE_SIZE)
     def _parse_search(cls, expr: str) -> Optional["_Node"]:
         toks = cls._tokenize(expr)
         i = 0
@@ -250,6 +323,226 @@ class ConditionalTagProcessorNode:
         except Exception:
             return None
 
+    # -------- item model (cached words + incremental word index) --------
+
+    class _Item:
+        """
+        解析済みのアイテム（種類・語・括弧内の要素は _parse_item の結果）
+
+        text は元の表記。括弧内の語を削除した場合は segs だけを更新し、テキストは出力時に組み立てる
+        """
+        __slots__ = ('text', 'kind', 'words', 'segs', 'key', 'epoch', 'prev', 'next')
+        def __init__(self, text, parsed, epoch=0):
+            self.text, self.epoch = text, epoch
+            self.kind, self.words, self.segs = parsed
+            self.key = 0
+            self.prev = self.next = None
+
+    class _ItemList:
+        """
+        アイテム列（双方向連結リスト）と「語→最初に出現するアイテム」の索引
+
+        - 各アイテムは生成時に一度だけ解析し（parse）、種類・語・括弧内の要素を保持する
+        - 位置は index ではなく順序キー（key）で表す。挿入で後続の key は変わらないため、
+          索引の更新は挿入・削除・書き換えたアイテムの語だけで済む
+        - 挿入・削除はリンクの付け替えだけで行い、リスト全体のシフトやコピーは発生しない
+          （key の隙間が尽きた時だけ全体を振り直す）
+        - 検索式の評価には first_by_id（語 ID→その語が最初に出現するアイテム）を使う
+        """
+        GAP = 1 << 16
+
+        def __init__(self, texts, parse, word_ids=None):
+            self._parse = parse
+            # 検索式で使う語の ID と、ID→その語が最初に出現するアイテム（_eval_search 用）
+            self.word_ids = word_ids if word_ids is not None else {}
+            self.first_by_id = [None] * len(self.word_ids)
+            # 番兵（head.next が先頭、head.prev が末尾）
+            self.head = ConditionalTagProcessorNode._Item('', (None, (), ()))
+            self.head.prev = self.head.next = self.head
+            self.by_key = {}
+            self.size = 0
+            self.word_items = {}
+            self.first = {}
+            # 実行済み REMOVE の回数（括弧アイテムの表記正規化の判定に使用）
+            self.remove_count = 0
+            prev = self.head
+            for i, t in enumerate(texts):
+                it = ConditionalTagProcessorNode._Item(t, parse(t))
+                it.key = (i + 1) * self.GAP
+                self._link(prev, it)
+                prev = it
+
+        def __len__(self):
+            return self.size
+
+        def __iter__(self):
+            it = self.head.next
+            while it is not self.head:
+                yield it
+                it = it.next
+
+        def __contains__(self, word):
+            return word in self.first
+
+        def last_key(self):
+            return self.head.prev.key if self.size else None
+
+        def _link(self, prev, it):
+            nxt = prev.next
+            it.prev, it.next = prev, nxt
+            prev.next = nxt.prev = it
+            self.by_key[it.key] = it
+            self.size += 1
+            self._index(it)
+
+        def _set_first(self, w, it):
+            if it is None:
+                del self.first[w]
+            else:
+                self.first[w] = it
+            wid = self.word_ids.get(w)
+            if wid is not None:
+                self.first_by_id[wid] = it
+
+        def _index(self, it):
+            for w in set(it.words):
+                s = self.word_items.get(w)
+                if s is None:
+                    self.word_items[w] = {it}
+                    self._set_first(w, it)
+                else:
+                    s.add(it)
+                    if it.key < self.first[w].key:
+                        self._set_first(w, it)
+
+        def _unindex(self, it):
+            for w in set(it.words):
+                s = self.word_items[w]
+                s.discard(it)
+                if not s:
+                    del self.word_items[w]
+                    self._set_first(w, None)
+                elif self.first[w] is it:
+                    self._set_first(w, min(s, key=lambda x: x.key))
+
+        def _relabel(self, gap):
+            self.by_key = {}
+            for i, it in enumerate(self):
+                it.key = (i + 1) * gap
+                self.by_key[it.key] = it
+
+        def items_with_words(self, words):
+            """words のいずれかを含むアイテム（重複なし）"""
+            touched = {}
+            for w in words:
+                for it in self.word_items.get(w, ()):
+                    touched[id(it)] = it
+            return list(touched.values())
+
+        def insert_after(self, key, texts_parsed):
+            """
+            key のアイテムの直後（key=None なら先頭）に (text, 解析結果) を順に挿入
+            """
+            m = len(texts_parsed)
+            anchor = self.head if key is None else self.by_key[key]
+            nxt = anchor.next
+            lo = anchor.key if anchor is not self.head else 0
+            hi = nxt.key if nxt is not self.head else lo + self.GAP * (m + 1)
+            if hi - lo <= m:
+                self._relabel(max(self.GAP, m + 1))
+                lo = anchor.key if anchor is not self.head else 0
+                hi = nxt.key if nxt is not self.head else lo + self.GAP * (m + 1)
+            step = (hi - lo) // (m + 1)
+            prev = anchor
+            for j, (text, parsed) in enumerate(texts_parsed):
+                it = ConditionalTagProcessorNode._Item(text, parsed, self.remove_count)
+                it.key = lo + step * (j + 1)
+                self._link(prev, it)
+                prev = it
+
+        def replace(self, it, text):
+            self._unindex(it)
+            it.text = text
+            it.kind, it.words, it.segs = self._parse(text)
+            self._index(it)
+
+        def update(self, it, words, segs):
+            """語と括弧内の要素だけを書き換える（種類は変わらない）"""
+            self._unindex(it)
+            it.words, it.segs = words, segs
+            self._index(it)
+
+        def remove(self, removed):
+            for it in removed:
+                self._unindex(it)
+                it.prev.next = it.next
+                it.next.prev = it.prev
+                it.prev = it.next = None
+                del self.by_key[it.key]
+                self.size -= 1
+
+    # -------- command extraction (cached per command block) --------
+
+    CMD_PATTERN = re.compile(r'<(ADD|REMOVE)\s*:\s*(.*?)\s*:\s*(.*?)>')
+
+    @classmethod
+    @lru_cache(maxsize=OPS_CACHE_SIZE)
+    def _compile_ops(cls, commands: Tuple[Tuple[str, str, str], ...]):
+        """
+        命令列 ((kind, search, target), ...) を前処理済みの (op 列, 語→ID) に変換
+        - ADD: ('ADD', (search, program, ((add_target, _parse_item の結果), ...)))
+        - REMOVE: ('REMOVE', (search, program, frozenset(remove_target)))
+        program は _compile_search の結果（search が空または解析できなければ None）。
+        同じ命令ブロックはキュー実行間で使い回されるため LRU でキャッシュする
+        """
+        word_ids = {}
+        ops = []
+        for kind, search, target in commands:
+            ast = cls._parse_search(search) if search != '' else None
+            program = cls._compile_search(ast, word_ids) if ast is not None else None
+            if kind == 'ADD':
+                raw_targets = tuple(
+                    (t, cls._parse_item(t))
+                    for t in cls._split_top_level(target) if t.strip()
+                )
+                ops.append((kind, (search, program, raw_targets)))
+                continue
+
+            targets = {t.strip() for t in cls._split_top_level(target)}
+            targets.discard('')
+            # 削除対象が空・search が解析できない命令は実行されることがないので除く
+            if targets and (search == '' or program is not None):
+                ops.append((kind, (search, program, frozenset(targets))))
+        return tuple(ops), MappingProxyType(word_ids)
+
+    @classmethod
+    def cache_info(cls):
+        """検索式・命令列キャッシュのヒット/ミス数（functools.lru_cache の CacheInfo）"""
+        return {
+            "search": cls._parse_search.cache_info(),
+            "ops": cls._compile_ops.cache_info(),
+        }
+
+    @classmethod
+    def cache_clear(cls):
+        cls._parse_search.cache_clear()
+        cls._compile_ops.cache_clear()
+
+    @classmethod
+    def _extract_commands(cls, s: str):
+        """
+        <ADD:...:...> / <REMOVE:...:...> を抽出し、(命令列, 命令以外のデータ部) を返す
+        """
+        commands = []
+        data_chunks = []
+        last = 0
+        for m in cls.CMD_PATTERN.finditer(s):
+            commands.append((m.group(1).upper(), m.group(2).strip(), m.group(3).strip()))
+            data_chunks.append(s[last:m.start()])
+            last = m.end()
+        data_chunks.append(s[last:])
+        return tuple(commands), ''.join(data_chunks).strip()
+
     # ----------------- ComfyUI entry point -----------------
 
     def process(self, text: str):
@@ -258,104 +551,127 @@ class ConditionalTagProcessorNode:
         """
         s = text if isinstance(text, str) else str(text)
 
-        # 抽出: <ADD:...:...> / <REMOVE:...:...>
-        cmd_pattern = re.compile(r'<(ADD|REMOVE)\s*:\s*(.*?)\s*:\s*(.*?)>')
-        ops: List[Tuple[str, str, str]] = [
-            (m.group(1).upper(), m.group(2).strip(), m.group(3).strip())
-            for m in cmd_pattern.finditer(s)
-        ]
-        data_part = cmd_pattern.sub('', s).strip()
+        commands, data_part = self._extract_commands(s)
+        return (self._apply_ops(data_part, self._compile_ops(commands)),)
 
-        items = self._split_top_level(data_part)
+    @classmethod
+    def _apply_ops(cls, data_part: str, compiled) -> str:
+        """データ部に前処理済みの op 列（_compile_ops の結果）を左から順に適用する"""
+        ops, word_ids = compiled
+        items = cls._ItemList(cls._split_top_level(data_part), cls._parse_item, word_ids)
+        first_by_id = items.first_by_id
+        eval_search = cls._eval_search
 
-        for kind, search, target in ops:
-            # 現在の語→最初の出現 index（括弧サブ語や CUT も含む）
-            first_pos = {}
-            for idx, it in enumerate(items):
-                for w in self._item_words(it):
-                    if w not in first_pos:
-                        first_pos[w] = idx
+        for kind, payload in ops:
+            # first_by_id が語 ID→最初に出現するアイテム（括弧サブ語や CUT も含む）を返す
 
             if kind == 'ADD':
-                raw_targets = [t for t in self._split_top_level(target) if t.strip()]
-                if not raw_targets:
+                search, program, targets = payload
+                if not targets:
                     continue
 
                 # 挿入位置の決定
-                if search.strip() == '':
-                    insert_after_index = len(items) - 1
+                if search == '':
+                    insert_after_key = items.last_key()
                 else:
-                    ast = self._parse_search(search)
-                    if ast is None:
+                    if program is None:
                         continue
-                    ok, pos = ast.eval(first_pos)
-                    if not ok:
+                    pos = eval_search(program, first_by_id)
+                    if pos is None:
                         continue
-                    insert_after_index = pos if isinstance(pos, int) else (len(items) - 1)
-
-                # 既存語セット（重複回避）
-                present_words = set(first_pos.keys())
-
-                # 追加候補を順に判定・蓄積
-                to_insert: List[str] = []
-                for rt in raw_targets:
-                    words_of_rt = set(self._item_words(rt))
-                    if any(w in present_words for w in words_of_rt):
+                    insert_after_key = pos
+
+                # 追加候補を順に判定・蓄積（既存語・追加済みの語は重複回避）
+                added_words = set()
+                to_insert = []
+                for rt, parsed in targets:
+                    words_of_rt = parsed[1]
+                    if any(w in items or w in added_words for w in words_of_rt):
                         continue
-                    to_insert.append(rt)
-                    present_words.update(words_of_rt)
+                    to_insert.append((rt, parsed))
+                    added_words.update(words_of_rt)
 
                 if not to_insert:
                     continue
 
                 # 直後に順次挿入
-                insert_at = insert_after_index + 1
-                for val in to_insert:
-                    items.insert(insert_at, val)
-                    insert_at += 1
+                items.insert_after(insert_after_key, to_insert)
 
             elif kind == 'REMOVE':
-                targets = {t.strip() for t in self._split_top_level(target)}
-                targets.discard('')
-                if not targets:
-                    continue
+                search, program, targets = payload
 
                 # 条件評価
-                cond_ok = True
-                if search.strip() != '':
-                    ast = self._parse_search(search)
-                    if ast is None:
-                        cond_ok = False
-                    else:
-                        cond_ok, _ = ast.eval(first_pos)
-                if not cond_ok:
+                if search != '' and eval_search(program, first_by_id) is None:
                     continue
 
-                # 実削除
-                new_items: List[str] = []
-                for it in items:
-                    t = it.strip()
-                    # 素の CUT → 語が targets にあれば全削除
-                    m = self.CUT_BARE.match(t)
-                    if m and m.group(1).strip() in targets:
-                        continue
+                # 実削除（targets の語を含むアイテムだけを見る）
+                cls._remove_words(items, targets)
+                items.remove_count += 1
+
+        # REMOVE 実行時は括弧アイテムの表記が正規化される（例: "(a,b)" → "(a, b)"）。
+        # 要素を削除したアイテムも含め、正規化した表記は出力時にまとめて組み立てる
+        paren = cls.ITEM_PAREN
+        remove_count = items.remove_count
+        texts = [
+            '(' + ', '.join(it.segs) + ')' if it.kind == paren and it.epoch < remove_count else it.text
+            for it in items
+        ]
 
-                    # 括弧 → サブ語削除、空なら全削除
-                    if t.startswith('(') and t.endswith(')'):
-                        replaced = self._remove_from_parenthetical(t, targets)
-                        if replaced is not None:
-                            new_items.append(replaced)
-                        continue
+        return cls._join_items(texts)
+
+
+def _process_prompts(rule_commands, prompts):
+    """rule_commands を prompts に順に適用（プロセスプールのワーカーからも呼ばれる）"""
+    node = ConditionalTagProcessorNode
+    results = []
+    for prompt in prompts:
+        s = prompt if isinstance(prompt, str) else str(prompt)
+        commands, data_part = node._extract_commands(s)
+        results.append(node._apply_ops(data_part, node._compile_ops(commands + rule_commands)))
+    return results
 
-                    # 通常
-                    wlist = self._item_words(t)
-                    bw = wlist[0] if wlist else ''
-                    if bw in targets:
-                        continue
-                    new_items.append(t)
 
-                items = new_items
+class ConditionalTagProcessorListNode:
+    """
+    Conditional Tag Processor (List)
+
+    共通の命令ブロック（rules）をプロンプトのリストにまとめて適用する。
+    - rules の命令は一度だけ解析し、全プロンプトで使い回す
+    - 各プロンプト内の命令は rules の命令より先に適用される
+      （Conditional Tag Processor に「prompt + rules」を渡した場合と同じ）
+    - rules 内の命令以外の文字列は無視する
+    - use_process_pool が True の場合、プロンプトを分割してプロセスプールで並列処理する
+      （workers=0 は CPU 数）。fork できない環境やプールが使えない場合は逐次処理にフォールバックする
+    - 出力は入力と同じ順序の STRING リスト
+    """
+
+    # プロセスプールを使う最小のプロンプト数（プロンプトと命令をワーカーに渡すコストに見合う件数）
+    MIN_PROMPTS_FOR_POOL = 256
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "prompts": ("STRING", {"forceInput": True}),
+                "rules": ("STRING", {"multiline": True, "default": ""}),
+                "use_process_pool": ("BOOLEAN", {"default": False}),
+                "workers": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1, "tooltip": "Number of worker processes. 0 uses the number of CPUs."}),
+            }
+        }
+
+    INPUT_IS_LIST = True
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("processed",)
+    OUTPUT_IS_LIST = (True,)
+    FUNCTION = "process"
+    CATEGORY = "text"
 
-        return (self._join_items(items),)
+    def process(self, prompts, rules, use_process_pool, workers):
+        rules = rules[0] if rules else ""
+        use_process_pool = use_process_pool[0] if use_process_pool else False
+        workers = workers[0] if workers else 0
 
+        rule_commands, _ = ConditionalTagProcessorNode._extract_commands(rules)
 
+        return (map_chunks("Conditional Tag Processor (List)", _process_prompts, (rule_commands, ), prompts,
+                           use_process_pool, workers, self.MIN_PROMPTS_FOR_POOL),)
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+import os
+import threading
+
+
+def stat_fingerprint(path):
+    """ファイルの変更判定用の (mtime_ns, size)"""
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class TextFileCache:
+    """
+    テキストファイルの内容をプロセス全体で共有する LRU キャッシュ
+
+    キーはパス、有効性は (mtime_ns, size) で判定する。変更のないファイルは
+    stat() だけで返し、キャッシュ全体の合計サイズが max_bytes を超えたら古いものから破棄する。
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, path, encoding='utf-8'):
+        """(内容, キャッシュから返したか) を返す"""
+        fingerprint = stat_fingerprint(path)
+        key = (os.path.abspath(path), encoding)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], True
+            self.misses += 1
+
+        with open(path, 'r', encoding=encoding) as file:
+            content = file.read()
+
+        size = fingerprint[1]
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            if size <= self.max_bytes:
+                self._entries[key] = (fingerprint, content, size)
+                self.total_bytes += size
+                while self.total_bytes > self.max_bytes:
+                    _, (_, _, evicted) = self._entries.popitem(last=False)
+                    self.total_bytes -= evicted
+        return content, False
+
+    def cache_info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+# LoadTextFileNode などで共有するキャッシュ
+text_file_cache = TextFileCache()
@@ -0,0 +1,181 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import atexit
+import os
+import threading
+
+
+def ensure_directory(path):
+    """ディレクトリを作成する（既に存在する場合や他のプロセスが同時に作成した場合もエラーにしない）"""
+    if path:
+        os.makedirs(path, exist_ok=True)
+
+
+def _create_temp(path):
+    """
+    path と同じディレクトリに一時ファイルを作成し、(fd, パス) を返す
+
+    tempfile.mkstemp は 0600 で作成するため、新規ファイルが所有者しか読めなくなる。
+    open(path, 'w') と同じく 0666 から umask を除いた権限で作成する。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    prefix = os.path.basename(path) + '.'
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+    for _ in range(100):
+        tmp = os.path.join(directory, prefix + os.urandom(6).hex() + '.tmp')
+        try:
+            return os.open(tmp, flags, 0o666), tmp
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"no usable temporary file name in {directory}")
+
+
+@contextmanager
+def open_atomic(path, encoding='utf-8'):
+    """
+    書き込み用に一時ファイルを開き、正常に閉じられた時だけ path と置き換える
+
+    途中でプロセスが落ちても、元の内容か新しい内容のどちらかが残る（書きかけのファイルにならない）。
+    例外が発生した場合は一時ファイルを削除し、path は変更しない。
+    """
+    fd, tmp = _create_temp(path)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            # 既存ファイルを置き換える場合は、その権限を引き継ぐ
+            os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_atomic(path, text, encoding='utf-8'):
+    """一時ファイルに書き込んでから置き換えることで、ファイルを丸ごと書き換える"""
+    with open_atomic(path, encoding) as f:
+        f.write(text)
+
+
+class AppendWriter:
+    """
+    1つのファイルへの追記をバッファリングする
+
+    - ファイルは追記モードで開いたままにし、実行ごとに open / close しない
+    - 溜まったデータが flush_bytes を超えるか、最初の未書き込みデータから flush_interval 秒経つと書き出す
+    """
+
+    def __init__(self, path, encoding='utf-8', flush_bytes=64 * 1024, flush_interval=1.0):
+        self.path = path
+        self.encoding = encoding
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self._file = open(path, 'ab')
+        # 書き込み済み＋バッファ中のバイト数（CSV のヘッダ判定などに使う）
+        self.size = self._file.seek(0, os.SEEK_END)
+        self._pending = []
+        self._pending_bytes = 0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        data = text.encode(self.encoding)
+        with self._lock:
+            if self._file is None:
+                raise ValueError(f"writer is closed: {self.path}")
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+            self.size += len(data)
+            if self._pending_bytes >= self.flush_bytes:
+                self._flush_locked()
+            elif self._timer is None:
+                # 追記が途切れてもデータが残り続けないよう、一定時間後に書き出す
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._file is None or not self._pending:
+            return
+        self._file.write(b''.join(self._pending))
+        self._file.flush()
+        self._pending.clear()
+        self._pending_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class AppendWriterPool:
+    """
+    パスごとの AppendWriter を共有する
+
+    同時に開いておくファイル数は max_open まで（超えたら最も古いものを書き出して閉じる）。
+    プロセス終了時には残っているデータをすべて書き出す。
+    """
+
+    def __init__(self, max_open=16):
+        self.max_open = max_open
+        self._writers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, encoding='utf-8') -> AppendWriter:
+        key = os.path.abspath(path)
+        with self._lock:
+            writer = self._writers.get(key)
+            if writer is not None and writer.encoding == encoding:
+                self._writers.move_to_end(key)
+                return writer
+            if writer is not None:
+                del self._writers[key]
+                writer.close()
+            writer = AppendWriter(path, encoding)
+            self._writers[key] = writer
+            while len(self._writers) > self.max_open:
+                _, evicted = self._writers.popitem(last=False)
+                evicted.close()
+        return writer
+
+    def flush(self, path):
+        """path のバッファを書き出す（開いていなければ何もしない）"""
+        with self._lock:
+            writer = self._writers.get(os.path.abspath(path))
+        if writer is not None:
+            writer.flush()
+
+    def close(self, path):
+        """path のバッファを書き出して閉じる（上書き保存の前に呼ぶ）"""
+        with self._lock:
+            writer = self._writers.pop(os.path.abspath(path), None)
+        if writer is not None:
+            writer.close()
+
+    def close_all(self):
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for writer in writers:
+            writer.close()
+
+
+# SaveTextFileNode などで共有する追記用ファイルハンドル
+append_writers = AppendWriterPool()
+atexit.register(append_writers.close_all)
@@ -7,7 +7,7 @@ import { api } from "../../scripts/api.js";
 app.registerExtension({
     name: "StringsFromTextbox",
     async beforeRegisterNodeDef(nodeType, nodeData, app) {
-        if (nodeData.name === "StringsFromTextbox" || nodeData.name === "PromptsFromTextbox") {
+        if (nodeData.name === "StringsFromTextbox" || nodeData.name === "PromptsFromTextbox" || nodeData.name === "LoadTextLine") {
             const origOnNodeCreated = nodeType.prototype.onNodeCreated;
             nodeType.prototype.onNodeCreated = function () {
                 const r = origOnNodeCreated ? origOnNodeCreated.apply(this) : undefined;
@@ -0,0 +1,221 @@
+from array import array
+from collections import OrderedDict
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from .file_cache import stat_fingerprint
+
+
+class LineIndex:
+    """
+    テキストの行頭オフセットを保持し、N 行目を O(1) で取り出すためのインデックス
+
+    text.split('\\n') と同じ行の区切り方をする（末尾が改行なら最後は空行）。
+    """
+
+    __slots__ = ("text", "starts")
+
+    def __init__(self, text: str):
+        self.text = text
+        # 各行の開始位置。最後の要素は番兵（len(text) + 1）
+        starts = array('q', [0])
+        find = text.find
+        pos = find('\n')
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find('\n', pos + 1)
+        starts.append(len(text) + 1)
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def line(self, index: int) -> str:
+        """index 行目（0 始まり）を返す。負の index は list と同様に末尾から数える"""
+        n = len(self.starts) - 1
+        if index < 0:
+            index += n
+        if index < 0 or index >= n:
+            raise IndexError("line index out of range")
+        return self.text[self.starts[index]:self.starts[index + 1] - 1]
+
+
+class LineIndexCache:
+    """
+    テキスト内容をキーにした LineIndex の LRU キャッシュ
+
+    キーは文字列そのもの（dict のハッシュ＋一致比較）なので、
+    同じ内容のテキストであれば実行ごとに別オブジェクトでも再利用される。
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> LineIndex:
+        with self._lock:
+            index = self._entries.get(text)
+            if index is not None:
+                self._entries.move_to_end(text)
+                return index
+
+        index = LineIndex(text)
+
+        with self._lock:
+            self._entries[text] = index
+            self._entries.move_to_end(text)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# StringsFromTextboxNode / PromptsFromTextboxNode で共有するキャッシュ
+line_index_cache = LineIndexCache()
+
+
+class FileLineIndex:
+    """
+    ファイルの行頭バイトオフセットを保持し、ファイル全体を読み込まずに N 行目を返す
+
+    - インデックスはファイルを mmap して改行を走査して作成する
+    - persist=True の場合はサイドカーファイル（<file>.lineidx）に保存し、
+      ファイルの (mtime_ns, size) が変わらない限り次回以降はそれを読み込む
+    - 行の区切りは LoadTextFileNode で読み込んで split('\\n') した場合と同じ（"\\r\\n" の "\\r" は除去）
+    """
+
+    MAGIC = b'TULIDX1\0'
+    HEADER = struct.Struct('<qqq')
+    SIDECAR_SUFFIX = '.lineidx'
+
+    def __init__(self, path, fingerprint, starts):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    @classmethod
+    def open(cls, path, persist=True):
+        fingerprint = stat_fingerprint(path)
+        sidecar = path + cls.SIDECAR_SUFFIX
+        if persist:
+            starts = cls._load_sidecar(sidecar, fingerprint)
+            if starts is not None:
+                return cls(path, fingerprint, starts)
+
+        starts = cls._build(path, fingerprint[1])
+        if persist:
+            cls._save_sidecar(sidecar, fingerprint, starts)
+        return cls(path, fingerprint, starts)
+
+    @staticmethod
+    def _build(path, size):
+        starts = array('q', [0])
+        if size > 0:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                find = mm.find
+                pos = find(b'\n')
+                while pos != -1:
+                    starts.append(pos + 1)
+                    pos = find(b'\n', pos + 1)
+        starts.append(size + 1)
+        return starts
+
+    @classmethod
+    def _load_sidecar(cls, sidecar, fingerprint):
+        try:
+            with open(sidecar, 'rb') as f:
+                if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                    return None
+                mtime_ns, size, count = cls.HEADER.unpack(f.read(cls.HEADER.size))
+                if (mtime_ns, size) != fingerprint:
+                    return None
+                starts = array('q')
+                starts.frombytes(f.read(count * starts.itemsize))
+        except (OSError, ValueError, struct.error):
+            return None
+        if len(starts) != count:
+            return None
+        if sys.byteorder == 'big':
+            starts.byteswap()
+        return starts
+
+    @classmethod
+    def _save_sidecar(cls, sidecar, fingerprint, starts):
+        data = array('q', starts)
+        if sys.byteorder == 'big':
+            data.byteswap()
+        tmp = f"{sidecar}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(cls.MAGIC)
+                f.write(cls.HEADER.pack(fingerprint[0], fingerprint[1], len(data)))
+                data.tofile(f)
+            os.replace(tmp, sidecar)
+        except OSError as e:
+            # 書き込めない場所ではメモリ上のインデックスだけを使う
+            print(f"Load Text Line: could not save line index {sidecar} ({e})")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def line(self, index: int, encoding='utf-8') -> str:
+        """index 行目（0 始まり）を返す。負の index は list と同様に末尾から数える"""
+        n = len(self.starts) - 1
+        if index < 0:
+            index += n
+        if index < 0 or index >= n:
+            raise IndexError("line index out of range")
+        start = self.starts[index]
+        length = self.starts[index + 1] - 1 - start
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            data = f.read(length)
+        if data.endswith(b'\r'):
+            data = data[:-1]
+        return data.decode(encoding)
+
+
+class FileLineIndexCache:
+    """パスをキーにした FileLineIndex の LRU キャッシュ（(mtime_ns, size) が変われば作り直す）"""
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, persist=True) -> FileLineIndex:
+        key = os.path.abspath(path)
+        fingerprint = stat_fingerprint(path)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None and index.fingerprint == fingerprint:
+                self._entries.move_to_end(key)
+                return index
+
+        index = FileLineIndex.open(path, persist)
+
+        with self._lock:
+            self._entries[key] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# LoadTextLineNode で共有するキャッシュ
+file_line_index_cache = FileLineIndexCache()
@@ -1,22 +1,198 @@
 import sys
 import os
 import re
+import json
 import math
-import shlex
-from .cond_tag_processor import ConditionalTagProcessorNode
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from .cond_tag_processor import ConditionalTagProcessorNode, ConditionalTagProcessorListNode
+from .line_index import line_index_cache, file_line_index_cache
+from .file_cache import text_file_cache, stat_fingerprint
+from .file_writer import append_writers, ensure_directory, open_atomic, write_atomic
+from .process_pool import map_chunks
+from .text_stream import (TextChunkSource, DEFAULT_CHUNK_SIZE, iter_match_spans, iter_remove_spans, iter_strip,
+                          iter_strip_comments, iter_sub, joined_marker_length)
+from . import prompt_log
+from .wildcard_cache import wildcard_result_cache, find_wildcard_directories
+
+# 変数定義: $name="value"
+VAR_DEF_PATTERN = re.compile(r'\$([a-zA-Z_][a-zA-Z0-9_]*)="([^"]*)"')
+# 変数参照: $name（アンダースコア2個 "__" の直前までをマッチし、それ以降はマッチしない）
+VAR_REF_PATTERN = re.compile(r"\$([a-zA-Z_][a-zA-Z0-9_]*?)(?=__|[^a-zA-Z0-9_]|$)")
+# チャンク単位で処理する際、続きのテキスト次第で変数定義・変数参照になりうる末尾
+VAR_DEF_TAIL_PATTERN = re.compile(r'\$(?:[a-zA-Z_][a-zA-Z0-9_]*(?:="[^"]*|=)?)?\Z')
+VAR_REF_TAIL_PATTERN = re.compile(r'\$[a-zA-Z0-9_]*\Z')
+# 上の末尾のうち、閉じ引用符が現れるまで続く変数定義（$name="...）
+VAR_DEF_OPEN_PATTERN = re.compile(r'\$[a-zA-Z_][a-zA-Z0-9_]*="[^"]*\Z')
+
+# remove_linefeed の選択肢（postprocess_text / iter_postprocess_text）
+REMOVE_LINEFEED_MODES = ("No", "All", "Blank Lines Only")
+
+# カンマの連続（前後の空白・改行を含む）
+COMMA_RUN_PATTERN = re.compile(r'\s*,[\s,]*')
+
+
+def normalize_commas(text):
+    """
+    カンマ区切りを正規化する
+
+    - 連続するカンマを1つにまとめ、カンマの前の空白を除去してカンマの後を空白1つにする（1回の置換）
+    - " BREAK," を削除する
+    - 末尾のカンマと前後の空白を除去する
+    """
+    if "," in text:
+        text = COMMA_RUN_PATTERN.sub(", ", text)
+        if "BREAK" in text:
+            text = text.replace(" BREAK,", "")
+        end = len(text)
+        while end >= 2 and text.startswith(", ", end - 2):
+            end -= 2
+        text = text[:end]
+    return text.strip()
+
+
+def _normalize_commas_safe_cut(text):
+    """
+    カンマ区切り正規化の結果が変わらない分割位置（0 は分割できない）
+
+    前後の文字がどちらも空白・カンマではなく、"BREAK" の途中でもない位置で分割する。
+    カンマの連続や " BREAK," がその位置をまたぐことはない。
+    （位置をまたぐ "BREAK" が text 内に収まるよう、末尾の4文字より前で探す）
+    """
+    for c in range(len(text) - 4, 0, -1):
+        a = text[c - 1]
+        b = text[c]
+        if a == "," or b == "," or a.isspace() or b.isspace():
+            continue
+        if "BREAK" in text[max(0, c - 4):c + 4] and any(text.startswith("BREAK", i) for i in range(max(0, c - 4), c)):
+            continue
+        return c
+    return 0
+
+
+def iter_normalize_commas(pieces):
+    """テキスト全体に normalize_commas() をした場合と同じ結果を断片ごとに返す"""
+    carry = ""
+    started = False
+    for piece in pieces:
+        buf = carry + piece if carry else piece
+        cut = _normalize_commas_safe_cut(buf)
+        if cut:
+            part = COMMA_RUN_PATTERN.sub(", ", buf[:cut])
+            if "BREAK" in part:
+                part = part.replace(" BREAK,", "")
+            if not started:
+                part = part.lstrip()
+                started = bool(part)
+            if part:
+                yield part
+        carry = buf[cut:]
+    # 末尾のカンマ・空白の除去は最後の断片だけで行う（分割位置の直前は空白・カンマではないため）
+    last = normalize_commas(carry)
+    if last:
+        yield last
+
+
+def _check_linefeed_mode(remove_linefeed):
+    if remove_linefeed not in REMOVE_LINEFEED_MODES:
+        raise ValueError(f"unknown remove_linefeed mode: {remove_linefeed!r} (expected one of {', '.join(REMOVE_LINEFEED_MODES)})")
+
+
+def iter_postprocess_text(pieces, remove_linefeed="No", normalize=False):
+    """postprocess_text() をチャンク単位で行う"""
+    _check_linefeed_mode(remove_linefeed)
+    if remove_linefeed == "Blank Lines Only":
+        pieces = _iter_remove_blank_lines(pieces)
+    elif remove_linefeed == "All":
+        pieces = (piece.replace("\n", "") for piece in pieces)
+    if normalize:
+        pieces = iter_normalize_commas(pieces)
+    return pieces
+
+
+def _iter_remove_blank_lines(pieces):
+    """
+    空行（空白だけの行を含む）を削除した結果を断片ごとに返す
+
+    行の内容は空白以外の文字が現れた時点で出力し、保持するのはその行の先頭から続く空白だけにする
+    （改行を含まない大きな入力でも、メモリ使用量が入力の大きさに比例しない）
+    """
+    pending = ""        # 現在の行の、まだ空行かどうか分からない先頭の空白
+    in_content = False  # 現在の行で空白以外の文字が出力済みか
+    emitted = False     # 残す行を1行以上出力したか（次に残す行の前に改行が必要）
+    for piece in pieces:
+        out = []
+        parts = piece.split("\n")
+        last = len(parts) - 1
+        for i, part in enumerate(parts):
+            if in_content:
+                if part:
+                    out.append(part)
+            elif part.strip():
+                if emitted:
+                    out.append("\n")
+                out.append(pending)
+                out.append(part)
+                pending = ""
+                in_content = emitted = True
+            else:
+                pending += part
+            if i < last:
+                # 改行で行が終わる
+                pending = ""
+                in_content = False
+        if out:
+            yield "".join(out)
+
+
+def postprocess_text(text, remove_linefeed="No", normalize=False):
+    """
+    RemoveCommentsNode / ReplaceVariablesAndProcessWildcardNode 共通の後処理
+    改行の削除（remove_linefeed）とカンマ区切りの正規化をコンパイル済みの正規表現で行う
+    """
+    _check_linefeed_mode(remove_linefeed)
+
+    # 空行を削除
+    if remove_linefeed == "Blank Lines Only":
+        text = "\n".join(filter(str.strip, text.split("\n")))
+
+    # 改行を削除
+    elif remove_linefeed == "All":
+        text = text.replace("\n", "")
+
+    # カンマ区切り正規化
+    if normalize:
+        text = normalize_commas(text)
+    return text
+
+# 解決済みの impact.wildcards モジュールとその process（初回呼び出し時に一度だけ解決する）
+_impact_wildcards = None
+_impact_wildcards_process = None
 
 def get_impact_wildcards():
-    try:
-        import impact.wildcards
-        return impact.wildcards
-    except ImportError:
-        import sys
-        import os
-        impact_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../ComfyUI-Impact-Pack/modules'))
-        if impact_path not in sys.path:
-            sys.path.append(impact_path)
-        import impact.wildcards
-        return impact.wildcards
+    global _impact_wildcards, _impact_wildcards_process
+    if _impact_wildcards is None:
+        try:
+            import impact.wildcards
+        except ImportError:
+            impact_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../ComfyUI-Impact-Pack/modules'))
+            if impact_path not in sys.path:
+                sys.path.append(impact_path)
+            import impact.wildcards
+        _impact_wildcards = impact.wildcards
+        _impact_wildcards_process = impact.wildcards.process
+        wildcard_result_cache.set_directories(find_wildcard_directories(impact.wildcards))
+    return _impact_wildcards
+
+def process_wildcards(text, seed):
+    """
+    Impact Pack のワイルドカード処理（impact.wildcards.process）を呼び出す
+    同じ (テキスト, seed) の結果はワイルドカードファイルが変わるまでキャッシュを使う
+    """
+    if _impact_wildcards_process is None:
+        get_impact_wildcards()
+    return wildcard_result_cache.process(text, seed, _impact_wildcards_process)
 
 class LoadTextFileNode:
 
@@ -35,14 +211,23 @@ class LoadTextFileNode:
     FUNCTION = 'load_text'
     CATEGORY = "text"
 
+    @classmethod
+    def IS_CHANGED(s, file_path, file_name):
+        # ファイルの更新日時とサイズが変わった時だけ再実行させる
+        try:
+            return str(stat_fingerprint(os.path.join(file_path, file_name)))
+        except OSError:
+            return float("NaN")
+
     def load_text(self, file_path, file_name):
 
-        fullpath = os.path.join(file_path, file_name)           
-        print(f"Load Text File: {fullpath}")
+        fullpath = os.path.join(file_path, file_name)
+
+        # 内容は (mtime, size) が変わるまでキャッシュを使う
+        content, cached = text_file_cache.read(fullpath, encoding='utf-8')
+        if not cached:
+            print(f"Load Text File: {fullpath}")
 
-        with open(fullpath, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
         return(content, )
 
 
@@ -56,7 +241,10 @@ class SaveTextFileNode:
                 "file_path": ("STRING", {"multiline": False, "default": ""}),
                 "file_name": ("STRING", {"multiline": False, "default": ""}),
                 "overwrite": ("BOOLEAN", {"default": True}),
-            }
+            },
+            "optional": {
+                "append": ("BOOLEAN", {"default": False, "tooltip": "If True, appends the text as one line to the end of the file (overwrite is ignored). Writes are buffered and flushed periodically."}),
+            },
         }
         
     RETURN_TYPES = ("STRING", )
@@ -65,26 +253,118 @@ class SaveTextFileNode:
     FUNCTION = 'save_text'
     CATEGORY = "text"
 
-    def save_text(self, text, file_path, file_name, overwrite):
+    def save_text(self, text, file_path, file_name, overwrite, append=False):
     
         fullpath = os.path.join(file_path, file_name)
 
-        if not os.path.exists(file_path):
-            os.makedirs(file_path)
+        ensure_directory(file_path)
+
+        # 追記: ファイルは開いたままにしてバッファリングし、一定サイズ・一定時間ごとに書き出す
+        if append:
+            append_writers.get(fullpath).write(text if text.endswith("\n") else text + "\n")
+            return (fullpath, )
 
         if os.path.exists(fullpath) and not overwrite:
             msg = f"File already exists: {fullpath}"
             print(msg)
             return (msg, )
- 
-        with open(fullpath, 'w', encoding='utf-8') as file:
-            file.write(text)
+
+        # 追記中のデータを先に書き出してから、一時ファイル経由で置き換える
+        append_writers.close(fullpath)
+        write_atomic(fullpath, text)
 
         print(f"Save Text File: {fullpath}")
         
         return (fullpath, )  
 
 
+class SavePromptLogNode:
+    """
+    生成に使ったプロンプト・シード・行番号・パラメータを1実行につき1レコード追記する（JSONL / CSV）
+
+    ファイルは開いたままにして追記をバッファリングする（SaveTextFileNode の append と同じ）。
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "prompt": ("STRING", {"forceInput": True, "multiline": True, "default": ""}),
+                "file_path": ("STRING", {"multiline": False, "default": ""}),
+                "file_name": ("STRING", {"multiline": False, "default": "prompt_log.jsonl"}),
+                "log_format": (list(prompt_log.FORMATS), {"default": "JSONL"}),
+                "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
+                "line_number": ("INT", {"default": 0, "min": 0, "step": 1}),
+            },
+            "optional": {
+                "parameters": ("STRING", {"forceInput": True, "multiline": True, "default": "", "tooltip": "Command-line style arguments (e.g. --steps 20 --cfg_scale 7). Values that differ from the defaults of Parse Prompt are recorded."}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", )
+    RETURN_NAMES = ("filepath", )
+    OUTPUT_NODE = True
+    FUNCTION = 'save'
+    CATEGORY = "text"
+
+    def save(self, prompt, file_path, file_name, log_format, seed, line_number, parameters=""):
+        fullpath = os.path.join(file_path, file_name)
+        ensure_directory(file_path)
+
+        # パラメータは Parse Prompt と同じ規則で解析し、デフォルトと異なる値だけを残す
+        parsed = {}
+        if parameters:
+            parsed = {key: value for key, value in PromptParser.parse(parameters).items()
+                      if value != PromptParser.DEFAULTS[key]}
+        record = {"prompt": prompt, "seed": seed, "line_number": line_number, "parameters": parsed}
+
+        writer = append_writers.get(fullpath)
+        if log_format == "CSV" and writer.size == 0:
+            writer.write(prompt_log.csv_header())
+        writer.write(prompt_log.format_record(record, log_format))
+        return (fullpath, )
+
+
+class LoadPromptLogNode:
+    """SavePromptLogNode で保存したログから index 番目のレコードを読み込む"""
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "file_path": ("STRING", {"multiline": False, "default": ""}),
+                "file_name": ("STRING", {"multiline": False, "default": "prompt_log.jsonl"}),
+                "log_format": (list(prompt_log.FORMATS), {"default": "JSONL"}),
+                "index": ("INT", {"default": 0, "min": -0x7fffffff, "max": 0x7fffffff, "tooltip": "Index of the record (0-based). Negative values count from the end (-1 is the last record)."}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "INT", "INT", "STRING", "INT", )
+    RETURN_NAMES = ("prompt", "seed", "line_number", "parameters", "total", )
+    OUTPUT_IS_LIST = (False, False, False, False, False, )
+    FUNCTION = 'load'
+    CATEGORY = "text"
+
+    @classmethod
+    def IS_CHANGED(s, file_path, file_name, **kwargs):
+        fullpath = os.path.join(file_path, file_name)
+        append_writers.flush(fullpath)
+        try:
+            return str(stat_fingerprint(fullpath))
+        except OSError:
+            return float("NaN")
+
+    def load(self, file_path, file_name, log_format, index):
+        fullpath = os.path.join(file_path, file_name)
+        # このセッションで追記中のレコードも読めるよう、バッファを書き出しておく
+        append_writers.flush(fullpath)
+
+        total = prompt_log.count_records(fullpath, log_format)
+        record = prompt_log.read_record(fullpath, log_format, index)
+        parameters = json.dumps(record.get("parameters", {}), ensure_ascii=False)
+        return (record["prompt"], record["seed"], record["line_number"], parameters, total, )
+
+
 class RemoveCommentsNode:
 
     @classmethod
@@ -95,11 +375,7 @@ class RemoveCommentsNode:
                 "line_comment": ("STRING", {"multiline": False, "default": "//"}),
                 "block_comment_start": ("STRING", {"multiline": False, "default": "/*"}),
                 "block_comment_end": ("STRING", {"multiline": False, "default": "*/"}),
-                "remove_linefeed": ([
-                    "No",
-                    "All",
-                    "Blank Lines Only",
-                ],),
+                "remove_linefeed": (list(REMOVE_LINEFEED_MODES),),
                 "normalize_commas": ("BOOLEAN", {"default": False}),
             }
         }
@@ -112,49 +388,203 @@ class RemoveCommentsNode:
 
     def remove_comments(self, text, line_comment, block_comment_start, block_comment_end, remove_linefeed, normalize_commas):
 
-        # block_comment_startとblock_comment_endの間の文字を削除（複数行コメント）
-        while block_comment_start in text:
-            start = text.find(block_comment_start)
-            end = text.find(block_comment_end)
-            # block_comment_endが見つからない場合は処理しない
-            if end == -1:
-                break
-            text = text[:start] + text[end + len(block_comment_end):]
-
-        # line_comment以降の文字を削除（単一行コメント）
-        while line_comment in text:
-            start = text.find(line_comment)
-            end = text.find("\n", start)
-            if end == -1:
-                end = len(text)
-            text = text[:start] + text[end:]
-
-        # 空行を削除
-        if remove_linefeed == "Blank Lines Only":
-            text = "\n".join([line for line in text.split("\n") if line.strip()])
-
-        # 改行を削除
-        elif remove_linefeed == "All":
-            text = text.replace("\n", "")
-
-        # カンマ区切り正規化
-        if normalize_commas:
-            text = self.normalize_commas(text)
+        # ブロックコメント・行コメントを削除
+        text = self.strip_comments(text, line_comment, block_comment_start, block_comment_end)
+
+        # 改行の削除・カンマ区切り正規化
+        text = postprocess_text(text, remove_linefeed, normalize_commas)
         return(text, )
 
+    @staticmethod
+    def strip_comments(text, line_comment, block_comment_start, block_comment_end):
+        """
+        ブロックコメントと行コメントを1回の走査で削除する（O(n)）
+
+        - ブロックコメントは行コメントより優先（行コメント内の /* */ も削除され、
+          その中の改行も消えるため行コメントは次の改行まで続く）
+        - block_comment_end が見つからないブロックコメント以降はブロックコメントとして処理しない
+        - ブロックコメントを削除してつながった前後の文字列が区切り文字になる場合は、その区切り文字として扱う
+          （例: "a //* b *// c" は "a " になる）
+        - 行コメントは改行の直前まで削除し、改行自体は残す
+        - 空の区切り文字は無効として扱う
+        """
+        n = len(text)
+        use_block = bool(block_comment_start) and bool(block_comment_end)
+        use_line = bool(line_comment)
+        block_start_len = len(block_comment_start)
+        block_end_len = len(block_comment_end)
+        line_len = len(line_comment)
+
+        def find_next(sub, start):
+            i = text.find(sub, start)
+            return n if i == -1 else i
+
+        # 各区切り文字の次の出現位置（n は「見つからない」）。pos を追い越した時だけ再探索する
+        next_block = find_next(block_comment_start, 0) if use_block else n
+        next_line = find_next(line_comment, 0) if use_line else n
+        next_lf = -1
+
+        marker_len = max(block_start_len, line_len)
+        chunks = []
+
+        def output_tail(length):
+            if chunks and len(chunks[-1]) >= length:
+                return chunks[-1][-length:]
+            tail = ""
+            for chunk in reversed(chunks):
+                tail = chunk + tail
+                if len(tail) >= length:
+                    break
+            return tail[-length:]
+
+        def drop_output(length):
+            while length:
+                chunk = chunks.pop()
+                if len(chunk) > length:
+                    chunks.append(chunk[:-length])
+                    break
+                length -= len(chunk)
+
+        pos = 0
+        in_line_comment = False
+        # 直前でブロックコメントを削除した（出力の末尾と pos 以降がつながって区切り文字になりうる）
+        joined = False
+        while pos < n:
+            if use_block and next_block < pos:
+                next_block = find_next(block_comment_start, pos)
+
+            if in_line_comment:
+                if next_lf < pos:
+                    next_lf = find_next("\n", pos)
+                # 行コメント内でブロックコメントを削除した結果、ブロックコメントの開始ができた場合
+                joined_block = 0
+                if joined and use_block:
+                    joined_block = joined_marker_length(comment, text, pos, block_comment_start)
+                if joined_block or next_block < next_lf:
+                    start = pos - joined_block if joined_block else next_block
+                    end = text.find(block_comment_end, start + block_start_len)
+                    if end == -1:
+                        # 閉じられていないブロックコメント以降は処理しない
+                        use_block = False
+                        next_block = n
+                        continue
+                    if joined_block:
+                        offset = len(comment) - joined_block - comment_start
+                        comment = comment[:-joined_block]
+                        if offset < line_len:
+                            # 行コメントの区切り文字にかかる場合はブロックコメントが優先され、行コメントではなくなる
+                            if offset >= 0:
+                                chunks.append(line_comment[:offset])
+                            else:
+                                drop_output(-offset)
+                            in_line_comment = False
+                    else:
+                        comment += text[pos:next_block]
+                        if len(comment) > 2 * marker_len:
+                            comment_start -= len(comment) - marker_len
+                            comment = comment[-marker_len:]
+                    pos = end + block_end_len
+                    joined = True
+                    continue
+                pos = next_lf
+                in_line_comment = False
+                joined = False
+                continue
+
+            if use_line and next_line < pos:
+                next_line = find_next(line_comment, pos)
+
+            # 出力の末尾とつながってできた区切り文字は pos より前から始まる
+            block_at, line_at = next_block, next_line
+            joined_block = joined_line = 0
+            if joined:
+                tail = output_tail(marker_len)
+                if use_block:
+                    joined_block = joined_marker_length(tail, text, pos, block_comment_start)
+                    if joined_block:
+                        block_at = pos - joined_block
+                if use_line:
+                    joined_line = joined_marker_length(tail, text, pos, line_comment)
+                    if joined_line:
+                        line_at = pos - joined_line
+
+            if block_at < n and block_at < line_at + line_len:
+                end = text.find(block_comment_end, block_at + block_start_len)
+                if end == -1:
+                    use_block = False
+                    next_block = n
+                    continue
+                if joined_block:
+                    drop_output(joined_block)
+                else:
+                    chunks.append(text[pos:block_at])
+                pos = end + block_end_len
+                joined = True
+                continue
+
+            joined = False
+            if line_at < n:
+                if joined_line:
+                    drop_output(joined_line)
+                else:
+                    chunks.append(text[pos:line_at])
+                pos = line_at + line_len
+                in_line_comment = True
+                # 行コメントの区切り文字と直前の出力（行コメント内でできたブロックコメントの開始の判定に使う）
+                comment = output_tail(marker_len) + line_comment
+                comment_start = len(comment) - line_len
+                continue
+
+            chunks.append(text[pos:])
+            break
+
+        return "".join(chunks)
+
     @staticmethod
     def normalize_commas(text):
-        # 1. 連続カンマ（カンマ＋空白含む）が2回以上続く部分を「, 」に置換
-        text = re.sub(r'(,\s*){2,}', ', ', text)
-        # 2. カンマ前スペース除去・カンマ後スペース1つ
-        text = re.sub(r'\s*,\s*', ', ', text)
-        # 3. " BREAK,"をまるごと削除（無駄なBREAK）
-        text = re.sub(r' BREAK,', '', text)        
-        # 4. 末尾カンマ・末尾スペース除去
-        text = re.sub(r'(, )+$', '', text)
+        return normalize_commas(text)
 
-        text = text.strip()
-        return text
+
+class RemoveCommentsFileNode:
+    """
+    RemoveCommentsNode のファイル版
+    入力ファイルを chunk_size 文字ずつ読み込んで処理し、結果を出力ファイルに書き込む（メモリ使用量はファイルサイズによらない）
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "input_file": ("STRING", {"multiline": False, "default": ""}),
+                "output_file": ("STRING", {"multiline": False, "default": ""}),
+                "line_comment": ("STRING", {"multiline": False, "default": "//"}),
+                "block_comment_start": ("STRING", {"multiline": False, "default": "/*"}),
+                "block_comment_end": ("STRING", {"multiline": False, "default": "*/"}),
+                "remove_linefeed": (list(REMOVE_LINEFEED_MODES),),
+                "normalize_commas": ("BOOLEAN", {"default": False}),
+                "chunk_size": ("INT", {"default": DEFAULT_CHUNK_SIZE, "min": 1024, "step": 1024, "tooltip": "Number of characters read at a time."}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", )
+    RETURN_NAMES = ("filepath", )
+    OUTPUT_NODE = True
+    FUNCTION = 'remove_comments'
+    CATEGORY = "text"
+
+    def remove_comments(self, input_file, output_file, line_comment, block_comment_start, block_comment_end, remove_linefeed, normalize_commas, chunk_size):
+        source = TextChunkSource(input_file, 'utf-8', chunk_size)
+        pieces = iter_strip_comments(source, line_comment, block_comment_start, block_comment_end)
+        pieces = iter_postprocess_text(pieces, remove_linefeed, normalize_commas)
+
+        ensure_directory(os.path.dirname(output_file))
+        # 入力と同じファイルを指定しても壊れないよう、一時ファイルに書き込んでから置き換える
+        with open_atomic(output_file) as f:
+            for piece in pieces:
+                f.write(piece)
+
+        print(f"Remove Comments (File): {input_file} -> {output_file}")
+        return (output_file, )
 
 
 class StringsFromTextboxNode:
@@ -177,17 +607,22 @@ class StringsFromTextboxNode:
     CATEGORY = "text"
 
     @staticmethod
-    def extract_line(text, start, mode, counter):
+    def target_line(start, mode, counter):
         if mode == "Fixed":
             # Fixed mode: start remains unchanged
-            target_line = start + counter - 1
+            return start + counter - 1
         else:
             # Continued mode: start is updated to the number at which the process has progressed
-            target_line = start - 1
+            return start - 1
+
+    @staticmethod
+    def extract_line(text, start, mode, counter):
+        target_line = StringsFromTextboxNode.target_line(start, mode, counter)
 
-        lines = text.split('\n')
-        if target_line <= len(lines):
-            return lines[target_line - 1]
+        # 行インデックスは内容ごとにキャッシュされ、バッチ実行中は再利用される
+        index = line_index_cache.get(text)
+        if target_line <= len(index):
+            return index.line(target_line - 1)
 
         return ""
 
@@ -196,6 +631,39 @@ class StringsFromTextboxNode:
         result = StringsFromTextboxNode.extract_line(text, start, mode, line_count)
         return (result, str(start + line_count - 1), str(counter), )
 
+class LoadTextLineNode:
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "file_path": ("STRING", {"multiline": False, "default": ""}),
+                "file_name": ("STRING", {"multiline": False, "default": ""}),
+                "start": ("INT", {"default": 1, "min": 0, "step": 1}),
+                "mode": (["Fixed", "Continued",], {"default": "Fixed", "tooltip": "If Fixed, start is left unchanged; if Continued, start is updated to the number at which the process has progressed."}),
+                "repeats_per_line": ("INT", {"default": 1, "min": 1, "step": 1}),
+                "persist_index": ("BOOLEAN", {"default": True, "tooltip": "If True, the line index is saved next to the file (<file_name>.lineidx) and reused while the file is unchanged."}),
+                "counter": ("INT", {"default": 0, "min": 0, "step": 1}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "STRING", "STRING", )
+    RETURN_NAMES = ("prompt", "line_counter", "total_counter", )
+    OUTPUT_IS_LIST = (False, False, False, )
+    FUNCTION = 'doit'
+    CATEGORY = "text"
+
+    def doit(self, file_path, file_name, start, mode, repeats_per_line, persist_index, counter):
+        fullpath = os.path.join(file_path, file_name)
+        line_count = math.ceil(counter / repeats_per_line)
+        target_line = StringsFromTextboxNode.target_line(start, mode, line_count)
+
+        # ファイル全体は読み込まず、行インデックスから対象の行だけを読む
+        index = file_line_index_cache.get(fullpath, persist_index)
+        result = ""
+        if target_line <= len(index):
+            result = index.line(target_line - 1)
+        return (result, str(start + line_count - 1), str(counter), )
+
 class StringsToListNode:
     @classmethod
     def INPUT_TYPES(s):
@@ -204,23 +672,41 @@ class StringsToListNode:
                 "text": ("STRING", {"multiline": True, "default": ""}),
                 "repeats_per_line": ("INT", {"default": 1, "min": 1, "step": 1}),
             },
+            "optional": {
+                "offset": ("INT", {"default": 0, "min": 0, "step": 1, "tooltip": "Index of the first element to output in the repeated list."}),
+                "chunk_size": ("INT", {"default": 0, "min": 0, "step": 1, "tooltip": "Maximum number of elements to output. 0 outputs everything from offset."}),
+            },
         }
-    RETURN_TYPES = ("STRING", )
-    RETURN_NAMES = ("prompts", )
-    OUTPUT_IS_LIST = (True, )
+    RETURN_TYPES = ("STRING", "INT", )
+    RETURN_NAMES = ("prompts", "total", )
+    OUTPUT_IS_LIST = (True, False, )
     FUNCTION = 'doit'
     CATEGORY = "text"
 
-    def doit(self, text, repeats_per_line):
-        lines = text.split('\n')
+    def doit(self, text, repeats_per_line, offset=0, chunk_size=0):
+        if offset == 0 and chunk_size == 0:
+            lines = text.split('\n')
+            results = []
+            i = 0
+            for i, _ in enumerate(lines):
+                result = lines[i]
+                # repeats_per_line分繰り返し
+                for _ in range(repeats_per_line):
+                    results.append(result)
+            return (results, len(results), )
+
+        # 指定範囲だけを出力（繰り返し後の位置から行番号を計算し、範囲外の行は取り出さない）
+        index = line_index_cache.get(text)
+        total = len(index) * repeats_per_line
+        end = total if chunk_size == 0 else min(total, offset + chunk_size)
         results = []
-        i = 0
-        for i, _ in enumerate(lines):
-            result = lines[i]
-            # repeats_per_line分繰り返し
-            for _ in range(repeats_per_line):
-                results.append(result)
-        return (results, )
+        pos = offset
+        while pos < end:
+            line_no = pos // repeats_per_line
+            count = min(end, (line_no + 1) * repeats_per_line) - pos
+            results.extend([index.line(line_no)] * count)
+            pos += count
+        return (results, total, )
 
 class PromptsFromTextboxNode:
     @classmethod
@@ -246,11 +732,14 @@ class PromptsFromTextboxNode:
     def doit(self, wildcard_text, seed, start, mode, repeats_per_line, counter):
         line_count = math.ceil(counter / repeats_per_line)
         target_string = StringsFromTextboxNode.extract_line(wildcard_text, start, mode, line_count)
-        result = get_impact_wildcards().process(target_string, seed)
+        result = process_wildcards(target_string, seed)
         return (result, str(start + line_count - 1), str(counter), )
 
 
 class ReplaceVariablesNode:
+    # 解決後の変数の値の最大長（参照の入れ子で値が指数的に長くなるのを防ぐ）
+    MAX_VALUE_LENGTH = 100000
+
     @classmethod
     def INPUT_TYPES(s):
         return {
@@ -267,8 +756,81 @@ class ReplaceVariablesNode:
 
     @staticmethod
     def get_variables(text):
-        var_pattern = re.compile(r'\$([a-zA-Z_][a-zA-Z0-9_]*)="([^"]*)"')
-        return (dict(var_pattern.findall(text)), var_pattern)
+        return (dict(VAR_DEF_PATTERN.findall(text)), VAR_DEF_PATTERN)
+
+    @staticmethod
+    def resolve_variables(var_defs):
+        """
+        値の中の変数参照（$other）を定義同士で先に解決する
+
+        依存関係を深さ優先でたどるため、参照先から順に（トポロジカル順に）一度ずつ解決される。
+        循環参照は検出した時点の参照を $name のまま残す。
+        展開すると値が MAX_VALUE_LENGTH を超える参照も、展開せずに $name のまま残す。
+        長い参照の連鎖でも再帰の上限に達しないよう、明示的なスタックでたどる。
+        """
+        max_length = ReplaceVariablesNode.MAX_VALUE_LENGTH
+        resolved = {}
+        visiting = set()
+        cyclic = set()
+        too_long = set()
+
+        for root in var_defs:
+            if root in resolved:
+                continue
+            # 解決中の変数ごとに [名前, 値, 値の中の参照, 次に見る参照の番号, 解決済みの断片, 処理済みの位置, 断片の長さの合計]
+            stack = [[root, var_defs[root], None, 0, [], 0, 0]]
+            while stack:
+                frame = stack[-1]
+                name, value, matches, i, out, prev, length = frame
+                if matches is None:
+                    if "$" not in value:
+                        resolved[name] = value
+                        stack.pop()
+                        continue
+                    visiting.add(name)
+                    matches = frame[2] = list(VAR_REF_PATTERN.finditer(value))
+
+                descend = None
+                while i < len(matches):
+                    m = matches[i]
+                    ref = m.group(1)
+                    if ref not in var_defs:
+                        i += 1
+                        continue
+                    if ref in visiting:
+                        cyclic.add(ref)
+                        i += 1
+                        continue
+                    if ref not in resolved:
+                        descend = ref
+                        break
+                    added = m.start() - prev + len(resolved[ref])
+                    if length + added + len(value) - m.end() > max_length:
+                        too_long.add(name)
+                        i += 1
+                        continue
+                    out.append(value[prev:m.start()])
+                    out.append(resolved[ref])
+                    length += added
+                    prev = m.end()
+                    i += 1
+                frame[3], frame[5], frame[6] = i, prev, length
+
+                if descend is not None:
+                    # 参照先を解決してから、この参照の位置に戻る
+                    stack.append([descend, var_defs[descend], None, 0, [], 0, 0])
+                    continue
+
+                out.append(value[prev:])
+                resolved[name] = "".join(out)
+                visiting.discard(name)
+                stack.pop()
+
+        if cyclic:
+            print(f"Circular variable references: {', '.join(sorted(cyclic))}")
+        if too_long:
+            print(f"Variable values longer than {max_length} characters, references left unexpanded: {', '.join(sorted(too_long))}")
+        return resolved
 
     @staticmethod
     def replace_variables(text, var_defs):
@@ -278,16 +840,15 @@ class ReplaceVariablesNode:
             var_name = match.group(1)
             return var_defs.get(var_name, match.group(0))
 
-        # アンダースコア2個 "__" の直前までをマッチし、それ以降はマッチしない
-        ref_pattern = re.compile(r"\$([a-zA-Z_][a-zA-Z0-9_]*?)(?=__|[^a-zA-Z0-9_]|$)")
-        replaced_text = ref_pattern.sub(replace_var, text)
-
-        return replaced_text
+        if "$" not in text:
+            return text
+        return VAR_REF_PATTERN.sub(replace_var, text)
 
     @staticmethod
     def doit(text):
-        # 変数定義の抽出: $name="value"
+        # 変数定義の抽出: $name="value"（値の中の変数参照は先に解決しておく）
         (var_defs, var_pattern) = ReplaceVariablesNode.get_variables(text)
+        var_defs = ReplaceVariablesNode.resolve_variables(var_defs)
 
         # 変数定義部分を削除
         text_wo_defs = var_pattern.sub("", text)
@@ -298,6 +859,59 @@ class ReplaceVariablesNode:
         # 先頭・末尾の不要な空白・改行を除去
         return (replaced_text.strip(),)
 
+class ReplaceVariablesFileNode:
+    """
+    ReplaceVariablesNode のファイル版
+    入力ファイルを chunk_size 文字ずつ読み込んで処理し、結果を出力ファイルに書き込む（メモリ使用量はファイルサイズによらない）
+
+    変数定義は使用箇所より後ろにあってもよいので、1回目の読み込みで定義を集め、2回目の読み込みで置換する。
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "input_file": ("STRING", {"multiline": False, "default": ""}),
+                "output_file": ("STRING", {"multiline": False, "default": ""}),
+                "chunk_size": ("INT", {"default": DEFAULT_CHUNK_SIZE, "min": 1024, "step": 1024, "tooltip": "Number of characters read at a time."}),
+            },
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("filepath",)
+    OUTPUT_NODE = True
+    FUNCTION = "doit"
+    CATEGORY = "text"
+
+    @staticmethod
+    def doit(input_file, output_file, chunk_size):
+        source = TextChunkSource(input_file, 'utf-8', chunk_size)
+
+        # 変数定義の抽出（後の定義が優先されるのは ReplaceVariablesNode と同じ）。位置は削除に使う
+        var_defs = {}
+        spans = []
+        for start, end, match in iter_match_spans(source, VAR_DEF_PATTERN, VAR_DEF_TAIL_PATTERN, VAR_DEF_OPEN_PATTERN, '"'):
+            var_defs[match.group(1)] = match.group(2)
+            spans.append((start, end))
+        var_defs = ReplaceVariablesNode.resolve_variables(var_defs)
+
+        def replace_var(match):
+            return var_defs.get(match.group(1), match.group(0))
+
+        # 変数定義部分の削除 → 変数参照の置換 → 先頭・末尾の空白・改行の除去
+        pieces = iter_remove_spans(source.chunks(), spans)
+        pieces = iter_sub(pieces, VAR_REF_PATTERN, replace_var, VAR_REF_TAIL_PATTERN)
+        pieces = iter_strip(pieces)
+
+        ensure_directory(os.path.dirname(output_file))
+        with open_atomic(output_file) as f:
+            for piece in pieces:
+                f.write(piece)
+
+        print(f"Replace Variables (File): {input_file} -> {output_file}")
+        return (output_file,)
+
+
 class ProcessWildcardNode:
     @classmethod
     def INPUT_TYPES(s):
@@ -316,10 +930,62 @@ class ProcessWildcardNode:
     FUNCTION = "doit"
 
     def doit(self, wildcard_text, seed):
-        result = get_impact_wildcards().process(wildcard_text, seed)
+        result = process_wildcards(wildcard_text, seed)
         return (result, )
 
 
+def _expand_wildcards(text, seeds):
+    """seeds の各シードで text を展開する（プロセスプールのワーカーからも呼ばれる）"""
+    return [process_wildcards(text, seed) for seed in seeds]
+
+
+class ProcessWildcardSeedSweepNode:
+    """
+    1つのワイルドカードテンプレートを連続したシードで展開し、結果をリストで返す
+
+    - 変数置換（Replace Variables と同じ処理）は展開前に一度だけ行う
+    - use_process_pool が True の場合はシードを分割してプロセスプールで展開する。
+      ワーカーは fork で起動して Impact Pack の読み込み済みワイルドカードを引き継ぎ、
+      fork できない環境では逐次処理する（wildcards.process はグローバルな乱数を seed で初期化するため、
+      スレッドでの並列化は結果が決定的にならない）
+    - 出力の順序は常にシードの順
+    """
+
+    # 1件ごとの展開が重いため、他のノードより少ない件数からプールを使う
+    MIN_COUNT_FOR_POOL = 64
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "wildcard_text": ("STRING", {"multiline": True, "default": ""}),
+                "seed_start": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff, "tooltip": "First seed used for wildcard processing."}),
+                "count": ("INT", {"default": 1, "min": 1, "max": 1000000, "step": 1, "tooltip": "Number of seeds (seed_start, seed_start + 1, ...)."}),
+                "replace_variables": ("BOOLEAN", {"default": True}),
+                "use_process_pool": ("BOOLEAN", {"default": False}),
+                "workers": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1, "tooltip": "Number of worker processes. 0 uses the number of CPUs."}),
+            },
+        }
+
+    CATEGORY = "text"
+
+    RETURN_TYPES = ("STRING", "INT", )
+    RETURN_NAMES = ("prompts", "seeds", )
+    OUTPUT_IS_LIST = (True, True, )
+    FUNCTION = "doit"
+
+    def doit(self, wildcard_text, seed_start, count, replace_variables, use_process_pool, workers):
+        text = ReplaceVariablesNode.doit(wildcard_text)[0] if replace_variables else wildcard_text
+        seeds = [(seed_start + i) & 0xffffffffffffffff for i in range(count)]
+
+        # ワーカーに引き継がせるため、Impact Pack は先に解決しておく
+        get_impact_wildcards()
+
+        prompts = map_chunks("Process Wildcard (Seed Sweep)", _expand_wildcards, (text, ), seeds,
+                             use_process_pool, workers, self.MIN_COUNT_FOR_POOL)
+        return (prompts, seeds, )
+
+
 class ReplaceVariablesAndProcessWildcardNode:
     @classmethod
     def INPUT_TYPES(s):
@@ -327,42 +993,74 @@ class ReplaceVariablesAndProcessWildcardNode:
             "required": {
                 "text": ("STRING", {"forceInput": True, "multiline": True, "default": ""}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff, "tooltip": "Determines the random seed to be used for wildcard processing."}),
-                "remove_linefeed": ([
-                    "No",
-                    "All",
-                    "Blank Lines Only",
-                ],),
+                "remove_linefeed": (list(REMOVE_LINEFEED_MODES),),
                 "normalize_commas": ("BOOLEAN", {"default": False}),
                 "remove_undefined_variables": ("BOOLEAN", {"default": False}),
                 "process_conditional_tags": ("BOOLEAN", {"default": False}),
                 "loop_count": ("INT", {"default": 1, "min": 1, "step": 1}),
             },
+            "optional": {
+                "stop_when_stable": ("BOOLEAN", {"default": False, "tooltip": "If True, the loop ends before loop_count once the text stops changing or no variables / wildcards remain."}),
+            },
         }
 
     CATEGORY = "text"
 
-    RETURN_TYPES = ("STRING", )
-    RETURN_NAMES = ("prompt", )
-    OUTPUT_IS_LIST = (False, )
+    RETURN_TYPES = ("STRING", "INT", )
+    RETURN_NAMES = ("prompt", "iterations", )
+    OUTPUT_IS_LIST = (False, False, )
     FUNCTION = "doit"
 
-    def doit(self, text, seed, remove_linefeed, normalize_commas, remove_undefined_variables, process_conditional_tags, loop_count):
-        # 変数定義の抽出: $name="value"
+    @staticmethod
+    def has_wildcard_syntax(text):
+        """Impact のワイルドカード処理の対象（__name__ / {a|b}）が含まれている可能性があるか"""
+        return "__" in text or "{" in text
+
+    @classmethod
+    def has_defined_variables(cls, text, var_defs):
+        """定義済みの変数への参照が残っているか"""
+        if "$" not in text or not var_defs:
+            return False
+        return any(name in var_defs for name in VAR_REF_PATTERN.findall(text))
+
+    def doit(self, text, seed, remove_linefeed, normalize_commas, remove_undefined_variables, process_conditional_tags, loop_count, stop_when_stable=False):
+        # 変数定義の抽出: $name="value"（値の中の変数参照は先に解決しておく）
         (var_defs, var_pattern) = ReplaceVariablesNode.get_variables(text)
+        var_defs = ReplaceVariablesNode.resolve_variables(var_defs)
 
         # 変数定義部分を削除
         work_text = var_pattern.sub("", text)
 
+        iterations = 0
         for _ in range(loop_count):
-            work_text = ReplaceVariablesNode.replace_variables(work_text, var_defs)
-            work_text = get_impact_wildcards().process(work_text, seed)
+            iterations += 1
+            new_text = ReplaceVariablesNode.replace_variables(work_text, var_defs)
+            # wildcards.process はワイルドカードの展開以外（# で始まるコメント行の削除など）も行うので、
+            # 安定判定モードでも呼び出しを省くのは、前回の出力から変化がなくワイルドカード構文も残っていない場合だけにする
+            skip_wildcards = (stop_when_stable and iterations > 1 and new_text == work_text
+                              and not self.has_wildcard_syntax(new_text))
+            if not skip_wildcards:
+                new_text = process_wildcards(new_text, seed)
+
+            if stop_when_stable:
+                # 変化がない、または変数・ワイルドカードが残っていなければ以降の反復も同じ結果になる
+                if new_text == work_text or not (self.has_defined_variables(new_text, var_defs) or self.has_wildcard_syntax(new_text)):
+                    work_text = new_text
+                    break
+            work_text = new_text
 
         # 未定義変数の削除
-        if remove_undefined_variables:
-            var_pattern = re.compile(r"\$([a-zA-Z_][a-zA-Z0-9_]*?)(?=__|[^a-zA-Z0-9_]|$)")
-            work_text = var_pattern.sub("", work_text)
+        if remove_undefined_variables and "$" in work_text:
+            # 削除と同時に削除した変数名を集める（1回の置換で処理する）
+            removed = set()
+
+            def remove_var(match):
+                removed.add(match.group(1))
+                return ""
+
+            work_text = VAR_REF_PATTERN.sub(remove_var, work_text)
             # 削除した変数をprintする
-            undefined_vars = set(var_pattern.findall(work_text)) - set(var_defs.keys())
+            undefined_vars = removed - set(var_defs.keys())
             if undefined_vars:
                 print(f"Removed undefined variables: {', '.join(undefined_vars)}")
 
@@ -371,21 +1069,11 @@ class ReplaceVariablesAndProcessWildcardNode:
             processor = ConditionalTagProcessorNode()
             work_text = processor.process(work_text)[0]
 
-        # 空行を削除
-        if remove_linefeed == "Blank Lines Only":
-            work_text = "\n".join([line for line in work_text.split("\n") if line.strip()])
-
-        # 改行を削除
-        elif remove_linefeed == "All":
-            work_text = work_text.replace("\n", "")
-
-        # カンマ区切り正規化
-        if normalize_commas:
-            work_text = RemoveCommentsNode.normalize_commas(work_text)
-
+        # 改行の削除・カンマ区切り正規化
+        work_text = postprocess_text(work_text, remove_linefeed, normalize_commas)
 
         # 先頭・末尾の不要な空白・改行を除去
-        return (work_text.strip(),)
+        return (work_text.strip(), iterations, )
 
 class PromptParser:
     """
@@ -400,43 +1088,170 @@ class PromptParser:
                    command-line style arguments.
 
     Returns:
-        dict: A dictionary containing all parsed parameters and their default values.
+        Mapping: A read-only view of all parsed parameters and their default values.
+                 Results are memoized per input text (see CACHE_SIZE / cache_info()).
     """
     # Maximum input length to prevent DoS attacks with extremely large strings
     MAX_INPUT_LENGTH = 100000
 
+    # デフォルト値の定義（parse ごとに dict() でコピーして使う）
+    DEFAULTS = MappingProxyType({
+        "prompt": "",
+        "negative_prompt": "",
+        "seed": -1,
+        "steps": 20,
+        "width": 512,
+        "height": 512,
+        "cfg_scale": 7.0,
+        "batch_size": 1,
+        "outpath_samples": "",
+        "outpath_grids": "",
+        "prompt_for_display": "",
+        "styles": "",
+        "sampler_name": "",
+        "subseed": -1,
+        "seed_resize_from_h": 0,
+        "seed_resize_from_w": 0,
+        "sampler_index": 0,
+        "n_iter": 1,
+        "subseed_strength": 0.0,
+        "restore_faces": False,
+        "tiling": False,
+        "do_not_save_samples": False,
+        "do_not_save_grid": False,
+    })
+
+    # 型変換テーブル（ここにないタグは文字列のまま）
+    CONVERTERS = MappingProxyType({
+        **dict.fromkeys(["seed", "subseed", "seed_resize_from_h", "seed_resize_from_w",
+                         "sampler_index", "batch_size", "n_iter", "steps", "width", "height"], int),
+        **dict.fromkeys(["subseed_strength", "cfg_scale"], float),
+        **dict.fromkeys(["restore_faces", "tiling", "do_not_save_samples", "do_not_save_grid"],
+                        lambda v: v.lower() == "true"),
+    })
+
+    # 次の "--" まで複数トークンを結合するタグ
+    MULTI_TOKEN_TAGS = frozenset(["prompt", "negative_prompt"])
+
+    # shlex.split (posix) と同じ区切り文字・引用符の規則で分割するためのパターン
+    _PLAIN_TOKEN = re.compile(r'[^ \t\r\n]+')
+    _TOKEN_PART = re.compile(r'''([^ \t\r\n'"\\]+)|\\(.)|'([^']*)'|"((?:[^"\\]|\\.)*)"|([ \t\r\n]+)''', re.S)
+    _DQ_ESCAPE = re.compile(r'\\(["\\])')
+
     @staticmethod
-    def parse(text):
-        # デフォルト値の定義
-        defaults = {
-            "prompt": "",
-            "negative_prompt": "",
-            "seed": -1,
-            "steps": 20,
-            "width": 512,
-            "height": 512,
-            "cfg_scale": 7.0,
-            "batch_size": 1,
-            "outpath_samples": "",
-            "outpath_grids": "",
-            "prompt_for_display": "",
-            "styles": "",
-            "sampler_name": "",
-            "subseed": -1,
-            "seed_resize_from_h": 0,
-            "seed_resize_from_w": 0,
-            "sampler_index": 0,
-            "n_iter": 1,
-            "subseed_strength": 0.0,
-            "restore_faces": False,
-            "tiling": False,
-            "do_not_save_samples": False,
-            "do_not_save_grid": False,
-        }
+    def tokenize(text):
+        """
+        shlex.split(text) と同じ結果を返すトークナイザ
+
+        引用符・バックスラッシュを含まない行は正規表現1回で分割する。
+        引用符の閉じ忘れや末尾のバックスラッシュは shlex と同様に ValueError。
+        """
+        if "'" not in text and '"' not in text and "\\" not in text:
+            return PromptParser._PLAIN_TOKEN.findall(text)
+
+        tokens = []
+        parts = []
+        in_token = False
+        pos = 0
+        n = len(text)
+        match = PromptParser._TOKEN_PART.match
+        while pos < n:
+            m = match(text, pos)
+            if m is None:
+                if text[pos] == "\\":
+                    raise ValueError("No escaped character")
+                raise ValueError("No closing quotation")
+            group = m.lastindex
+            if group == 5:
+                # 空白 → トークンの区切り
+                if in_token:
+                    tokens.append("".join(parts))
+                    parts = []
+                    in_token = False
+            elif group == 4:
+                parts.append(PromptParser._DQ_ESCAPE.sub(r"\1", m.group(4)))
+                in_token = True
+            else:
+                parts.append(m.group(group))
+                in_token = True
+            pos = m.end()
+        if in_token:
+            tokens.append("".join(parts))
+        return tokens
+
+    # 解析結果のメモ（同じテキストを解析する複数のノードで結果を共有する）
+    CACHE_SIZE = 512
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _cache_hits = 0
+    _cache_misses = 0
+
+    @staticmethod
+    def parse(text, errors=None):
+        """
+        解析結果を読み取り専用の dict ビュー（MappingProxyType）で返す。
+        同じテキストの結果は LRU でメモされ、呼び出し元の間で共有される。
+        errors にリストを渡すと、無視された引数などの警告メッセージを追加する
+        """
+        cls = PromptParser
+        with cls._cache_lock:
+            entry = cls._cache.get(text)
+            if entry is not None:
+                cls._cache.move_to_end(text)
+                cls._cache_hits += 1
+            else:
+                cls._cache_misses += 1
+
+        if entry is None:
+            parse_errors = []
+            entry = (MappingProxyType(cls._parse(text, parse_errors)), tuple(parse_errors))
+            if cls.CACHE_SIZE > 0:
+                with cls._cache_lock:
+                    cls._cache[text] = entry
+                    while len(cls._cache) > cls.CACHE_SIZE:
+                        cls._cache.popitem(last=False)
+
+        if errors is not None:
+            errors.extend(entry[1])
+        return entry[0]
+
+    @staticmethod
+    def set_cache_size(size):
+        """メモの最大件数を変更する（0 でメモしない）"""
+        cls = PromptParser
+        with cls._cache_lock:
+            cls.CACHE_SIZE = max(0, size)
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+
+    @staticmethod
+    def cache_info():
+        cls = PromptParser
+        with cls._cache_lock:
+            return {
+                "hits": cls._cache_hits,
+                "misses": cls._cache_misses,
+                "size": len(cls._cache),
+                "max_size": cls.CACHE_SIZE,
+            }
+
+    @staticmethod
+    def cache_clear():
+        cls = PromptParser
+        with cls._cache_lock:
+            cls._cache.clear()
+            cls._cache_hits = 0
+            cls._cache_misses = 0
+
+    @staticmethod
+    def _parse(text, errors):
+        # デフォルト値（テンプレートをコピーして使う）
+        defaults = dict(PromptParser.DEFAULTS)
 
         # 入力長を制限（DoS攻撃対策）
         if len(text) > PromptParser.MAX_INPUT_LENGTH:
             defaults["prompt"] = text[:PromptParser.MAX_INPUT_LENGTH]
+            errors.append(f"Input is longer than {PromptParser.MAX_INPUT_LENGTH} characters and was truncated")
             return defaults
 
         # 行に "--" が含まれていない場合は、全体を prompt として扱う
@@ -445,14 +1260,15 @@ class PromptParser:
             return defaults
 
         try:
-            # shlex で分割
-            args = shlex.split(text)
-        except ValueError:
+            # shlex 互換の規則で分割
+            args = PromptParser.tokenize(text)
+        except ValueError as e:
             # パースエラー（引用符の閉じ忘れなど）の場合は、全体を prompt として扱う
             defaults["prompt"] = text
+            errors.append(f"{e}; the whole line is used as the prompt")
             return defaults
 
-        parsed = defaults.copy()
+        parsed = defaults
         
         i = 0
         
@@ -474,10 +1290,11 @@ class PromptParser:
                 
                 if i >= len(args):
                     print(f"Warning: Tag '--{tag}' is missing a value")
+                    errors.append(f"Tag '--{tag}' is missing a value")
                     break
                 
                 # prompt, negative_prompt は次の -- が来るまで結合
-                if tag in ["prompt", "negative_prompt"]:
+                if tag in PromptParser.MULTI_TOKEN_TAGS:
                     values = []
                     while i < len(args) and not args[i].startswith("--"):
                         values.append(args[i])
@@ -503,26 +1320,16 @@ class PromptParser:
                     val_str = args[i]
                     i += 1
                     
-                    # 型変換
-                    if tag in ["seed", "subseed", "seed_resize_from_h", "seed_resize_from_w", 
-                               "sampler_index", "batch_size", "n_iter", "steps", "width", "height"]:
-                        try:
-                            parsed[tag] = int(val_str)
-                        except ValueError:
-                            pass # 変換失敗時は無視（デフォルト値のまま）
-                            
-                    elif tag in ["subseed_strength", "cfg_scale"]:
+                    # 型変換（テーブルにないタグは文字列型: outpath_samples, outpath_grids, prompt_for_display, styles, sampler_name など）
+                    convert = PromptParser.CONVERTERS.get(tag)
+                    if convert is None:
+                        parsed[tag] = val_str
+                    else:
                         try:
-                            parsed[tag] = float(val_str)
+                            parsed[tag] = convert(val_str)
                         except ValueError:
-                            pass  # 変換失敗時は無視（デフォルト値のまま）
-                            
-                    elif tag in ["restore_faces", "tiling", "do_not_save_samples", "do_not_save_grid"]:
-                        parsed[tag] = (val_str.lower() == "true")
-                        
-                    else:
-                        # 文字列型（outpath_samples, outpath_grids, prompt_for_display, styles, sampler_name など）
-                        parsed[tag] = val_str
+                            # 変換失敗時は無視（デフォルト値のまま）
+                            errors.append(f"Invalid value for '--{tag}': {val_str!r}")
             else:
                 # オプションでないトークンはスキップ（初期プロンプトは既に処理済み）
                 i += 1
@@ -563,6 +1370,65 @@ class ParsePromptFullNode:
         )
 
 
+def _parse_prompt_lines(lines):
+    """
+    各行を解析し、(結果の dict, 警告メッセージ) のリストを返す（プロセスプールのワーカーからも呼ばれる）
+    バッチの行はほとんど重複せずメモを押し流すだけなので、PromptParser.parse のメモを通さずに解析する
+    （_parse の結果は dict なので、そのままプロセス間で受け渡せる）
+    """
+    results = []
+    for line in lines:
+        errors = []
+        results.append((PromptParser._parse(line, errors), errors))
+    return results
+
+
+class ParsePromptBatchNode:
+    """
+    A1111 の "Prompts from file or textbox" 形式のテキスト全体を1回で解析し、
+    パラメータごとのリスト（列）として出力する
+    """
+
+    # プロセスプールを使う最小の行数（1行の解析は軽いため、少ない行数では起動コストの方が大きい）
+    MIN_LINES_FOR_POOL = 1000
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "text": ("STRING", {"forceInput": True, "multiline": True, "default": ""}),
+                "skip_empty_lines": ("BOOLEAN", {"default": True}),
+                "use_process_pool": ("BOOLEAN", {"default": False}),
+                "workers": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1, "tooltip": "Number of worker processes. 0 uses the number of CPUs."}),
+            },
+        }
+
+    RETURN_TYPES = ParsePromptFullNode.RETURN_TYPES + ("INT", "STRING", )
+    RETURN_NAMES = ParsePromptFullNode.RETURN_NAMES + ("line_number (INT)", "errors (STRING)", )
+    OUTPUT_IS_LIST = (True,) * (len(ParsePromptFullNode.RETURN_NAMES) + 1) + (False, )
+    FUNCTION = "parse"
+    CATEGORY = "text"
+
+    def parse(self, text, skip_empty_lines, use_process_pool, workers):
+        lines = text.split("\n")
+        line_numbers = [i + 1 for i, line in enumerate(lines) if line.strip() or not skip_empty_lines]
+        targets = [lines[n - 1] for n in line_numbers]
+
+        results = map_chunks("Parse Prompt (Batch)", _parse_prompt_lines, (), targets,
+                             use_process_pool, workers, self.MIN_LINES_FOR_POOL)
+
+        # 列ごとのリストに変換
+        columns = {key: [] for key in PromptParser.DEFAULTS}
+        error_lines = []
+        for line_number, (parsed, errors) in zip(line_numbers, results):
+            for key, column in columns.items():
+                column.append(parsed[key])
+            for error in errors:
+                error_lines.append(f"line {line_number}: {error}")
+
+        return tuple(columns.values()) + (line_numbers, "\n".join(error_lines), )
+
+
 class AnyType(str):
     """ComfyUIのワイルドカード型。任意の型にマッチするために__eq__は常にTrueを返す"""
     def __eq__(self, __value: object) -> bool:
@@ -612,29 +1478,45 @@ class ParsePromptCustomNode:
 NODE_CLASS_MAPPINGS = {
     "LoadTextFile": LoadTextFileNode,
     "SaveTextFile": SaveTextFileNode,
+    "SavePromptLog": SavePromptLogNode,
+    "LoadPromptLog": LoadPromptLogNode,
     "RemoveComments": RemoveCommentsNode,
+    "RemoveCommentsFile": RemoveCommentsFileNode,
     "StringsFromTextbox": StringsFromTextboxNode,
+    "LoadTextLine": LoadTextLineNode,
     "StringsToList": StringsToListNode,
     "PromptsFromTextbox": PromptsFromTextboxNode,
     "ReplaceVariables": ReplaceVariablesNode,
+    "ReplaceVariablesFile": ReplaceVariablesFileNode,
     "ProcessWildcard": ProcessWildcardNode,
+    "ProcessWildcardSeedSweep": ProcessWildcardSeedSweepNode,
     "ReplaceVariablesAndProcessWildcard": ReplaceVariablesAndProcessWildcardNode,
     "ConditionalTagProcessorNode": ConditionalTagProcessorNode,
+    "ConditionalTagProcessorList": ConditionalTagProcessorListNode,
     "ParsePromptFull": ParsePromptFullNode,
     "ParsePromptCustom": ParsePromptCustomNode,
+    "ParsePromptBatch": ParsePromptBatchNode,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "LoadTextFile": "Load Text File",
     "SaveTextFile": "Save Text File",
+    "SavePromptLog": "Save Prompt Log",
+    "LoadPromptLog": "Load Prompt Log",
     "RemoveComments": "Remove Comments",
+    "RemoveCommentsFile": "Remove Comments (File)",
     "StringsFromTextbox": "Strings from textbox",
+    "LoadTextLine": "Load Text Line",
     "StringsToList": "Strings to List",
     "PromptsFromTextbox": "Prompts from textbox",
     "ReplaceVariables": "Replace Variables",
+    "ReplaceVariablesFile": "Replace Variables (File)",
     "ProcessWildcard": "Process Wildcard",
+    "ProcessWildcardSeedSweep": "Process Wildcard (Seed Sweep)",
     "ReplaceVariablesAndProcessWildcard": "Replace Variables and Process Wildcard (Loop)",
     "ConditionalTagProcessorNode": "Conditional Tag Processor",
+    "ConditionalTagProcessorList": "Conditional Tag Processor (List)",
     "ParsePromptFull": "Parse Prompt (Full)",
     "ParsePromptCustom": "Parse Prompt (Custom)",
+    "ParsePromptBatch": "Parse Prompt (Batch)",
 }
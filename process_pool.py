@@ -0,0 +1,42 @@
+import os
+
+
+def map_chunks(name, func, args, items, use_process_pool, workers, min_items):
+    """
+    func(*args, items の一部) を items を分割して実行し、結果を items の順に連結したリストを返す
+
+    - use_process_pool が True で items が min_items 件以上の場合はプロセスプールで並列に実行する
+      （workers=0 は CPU 数）。プールの起動コストがあるため、件数が少ない場合は逐次処理する
+    - プールが使えない場合は name を付けて理由を出力し、逐次処理する（結果は同じ）
+    - func は items の一部を受け取ってその結果のリストを返す、モジュールレベルの関数であること
+    """
+    if use_process_pool and len(items) >= min_items:
+        try:
+            return _map_in_pool(func, args, items, workers)
+        except Exception as e:
+            print(f"{name}: process pool unavailable, falling back to sequential processing ({e})")
+    return func(*args, items)
+
+
+def _map_in_pool(func, args, items, workers):
+    """
+    プールは fork で起動する。spawn（Windows や macOS の既定）の子プロセスは
+    ComfyUI が読み込んだカスタムノードのパッケージや Impact Pack を import し直せないため、
+    fork できない環境では RuntimeError にして逐次処理させる
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise RuntimeError("the 'fork' start method is not available")
+
+    workers = workers or os.cpu_count() or 1
+    # ワーカーごとに数チャンクずつ渡して負荷を平準化する
+    chunk_size = max(1, -(-len(items) // (workers * 4)))
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+        for part in executor.map(func, *[[arg] * len(chunks) for arg in args], chunks):
+            results.extend(part)
+    return results
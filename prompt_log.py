@@ -0,0 +1,92 @@
+from collections import deque
+from itertools import islice
+import csv
+import io
+import json
+import os
+
+from .line_index import file_line_index_cache
+
+# 1レコードの項目（CSV の列順）
+FIELDS = ("prompt", "seed", "line_number", "parameters")
+FORMATS = ("JSONL", "CSV")
+
+
+def format_record(record, fmt):
+    """record（FIELDS をキーとする dict）を1レコード分の文字列にする（末尾の改行を含む）"""
+    if fmt == "JSONL":
+        # ensure_ascii=False でも改行はエスケープされるので、1レコードは必ず1行になる
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    row = [record[key] for key in FIELDS]
+    row[3] = json.dumps(row[3], ensure_ascii=False)
+    return format_csv_row(row)
+
+
+def format_csv_row(row):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(row)
+    return buffer.getvalue()
+
+
+def csv_header():
+    return format_csv_row(FIELDS)
+
+
+def _from_csv_row(row):
+    if len(row) != len(FIELDS):
+        raise ValueError(f"invalid CSV record: expected {len(FIELDS)} columns, got {len(row)}")
+    prompt, seed, line_number, parameters = row
+    return {
+        "prompt": prompt,
+        "seed": int(seed),
+        "line_number": int(line_number),
+        "parameters": json.loads(parameters) if parameters else {},
+    }
+
+
+def _jsonl_index(path):
+    """JSONL ファイルの行インデックスとレコード数（末尾の改行の後の空行は数えない）"""
+    # 追記で毎回内容が変わるので、サイドカーファイルには保存しない
+    index = file_line_index_cache.get(path, persist=False)
+    count = len(index)
+    if count and index.starts[-2] == os.path.getsize(path):
+        count -= 1
+    return index, count
+
+
+def _csv_rows(path, encoding):
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        rows = csv.reader(f)
+        next(rows, None)  # ヘッダ
+        yield from rows
+
+
+def count_records(path, fmt, encoding='utf-8'):
+    if fmt == "JSONL":
+        return _jsonl_index(path)[1]
+    return sum(1 for _ in _csv_rows(path, encoding))
+
+
+def read_record(path, fmt, index, encoding='utf-8'):
+    """
+    index 番目（0 始まり、負の値は末尾から）のレコードを返す
+
+    - JSONL: 行インデックスを使い、対象の1行だけを読む
+    - CSV: 値に改行を含められるため行インデックスは使えない。先頭から順に読み、対象のレコードまでしか保持しない
+    """
+    if fmt == "JSONL":
+        line_index, count = _jsonl_index(path)
+        if index < 0:
+            index += count
+        if index < 0 or index >= count:
+            raise IndexError("record index out of range")
+        return json.loads(line_index.line(index, encoding))
+
+    if index >= 0:
+        row = next(islice(_csv_rows(path, encoding), index, None), None)
+    else:
+        last = deque(_csv_rows(path, encoding), maxlen=-index)
+        row = last[0] if len(last) == -index else None
+    if row is None:
+        raise IndexError("record index out of range")
+    return _from_csv_row(row)
@@ -0,0 +1,453 @@
+"""
+大きなテキストファイルを一定サイズのチャンクごとに処理するための部品
+
+各関数は文字列の断片（piece）を受け取って断片を返すジェネレータで、
+チャンクの境界をまたぐトークンは次の断片と連結してから処理する。
+断片をすべて連結した結果は、テキスト全体を一度に処理した結果と一致する。
+"""
+from bisect import bisect_right, insort
+import sys
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_NOT_FOUND = sys.maxsize
+
+
+def joined_marker_length(tail, text, pos, marker):
+    """
+    tail の末尾と text[pos:] の先頭をつなげると marker になる場合に、tail 側の文字数を返す（ならない場合は 0）
+
+    コメントを削除して前後の文字列がつながった位置に区切り文字ができたかどうかの判定に使う。
+    複数の候補がある場合は最も前から始まるものを返す
+    """
+    if pos >= len(text) or text[pos] not in marker[1:]:
+        return 0
+    for k in range(min(len(marker) - 1, len(tail)), 0, -1):
+        if tail.endswith(marker[:k]) and text.startswith(marker[k:], pos):
+            return k
+    return 0
+
+
+class TextChunkSource:
+    """テキストファイルを chunk_size 文字ずつ読み込む（何度でも先頭、または任意の文字位置から読み直せる）"""
+
+    def __init__(self, path, encoding='utf-8', chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.encoding = encoding
+        self.chunk_size = max(1, chunk_size)
+        # 読み込んだチャンクの先頭の文字位置と、その位置の tell() の値（途中から読み直す時に seek する）
+        self._offsets = [0]
+        self._cookies = {0: 0}
+
+    def chunks(self, offset=0):
+        with open(self.path, 'r', encoding=self.encoding) as f:
+            # テキストモードの seek は文字位置を指定できないので、読み込み済みの最も近い位置に seek してから読み飛ばす
+            pos = self._offsets[bisect_right(self._offsets, offset) - 1]
+            if pos:
+                f.seek(self._cookies[pos])
+            while pos < offset:
+                skipped = f.read(min(offset - pos, self.chunk_size))
+                if not skipped:
+                    return
+                pos += len(skipped)
+            while True:
+                if pos not in self._cookies:
+                    self._cookies[pos] = f.tell()
+                    insort(self._offsets, pos)
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+                pos += len(chunk)
+
+    def read(self, start, end):
+        """文字位置 start から end までのテキストを読み込む"""
+        out = []
+        remaining = end - start
+        chunks = self.chunks(start)
+        try:
+            for chunk in chunks:
+                if remaining <= 0:
+                    break
+                out.append(chunk[:remaining])
+                remaining -= len(chunk)
+        finally:
+            chunks.close()
+        return "".join(out)
+
+
+def _complete_matches(buf, pattern, tail):
+    """
+    buf の中で確定したマッチのリストと、次の断片に持ち越す位置を返す
+
+    tail は「続きのテキスト次第でマッチになりうる末尾」にマッチするパターン（\\Z で終わる）。
+    その開始位置より前のマッチだけを確定とし、それ以降は次の断片と連結してから探す。
+    """
+    matches = []
+    t = tail.search(buf)
+    for m in pattern.finditer(buf):
+        if t is not None:
+            if m.start() >= t.start():
+                break
+            if m.end() > t.start():
+                # 持ち越し候補が確定したマッチの内側だった場合は、その後ろから探し直す
+                t = tail.search(buf, m.end())
+        matches.append(m)
+    return matches, (len(buf) if t is None else t.start())
+
+
+def iter_match_spans(source, pattern, tail, open_tail, closer):
+    """
+    ファイル全体に pattern.finditer をした場合と同じマッチを (開始位置, 終了位置, match) で返す
+
+    open_tail は tail のうち「次の closer までがマッチになる」形（例: 閉じ引用符のない $name="...）。
+    この形の末尾は持ち越さずに開始位置だけを覚え、closer が見つかった時にその範囲を読み直してマッチを作る。
+    closer が最後まで現れなければマッチにならず、それ以降にマッチもない（closer を含まないため）。
+    閉じられないマッチ候補があってもメモリ使用量・処理時間がファイルサイズに比例して増えない。
+    """
+    buf = ""
+    base = 0  # buf[0] のファイル内の文字位置
+    pos = 0  # 次に読み込むチャンクの文字位置
+    open_start = None  # 閉じられていないマッチ候補の開始位置
+    for chunk in source.chunks():
+        chunk_pos = pos
+        pos += len(chunk)
+        if open_start is not None:
+            q = chunk.find(closer)
+            if q == -1:
+                continue
+            end = chunk_pos + q + 1
+            yield open_start, end, pattern.match(source.read(open_start, end))
+            open_start = None
+            buf = chunk[q + 1:]
+            base = end
+        else:
+            buf = buf + chunk if buf else chunk
+        matches, cut = _complete_matches(buf, pattern, tail)
+        for m in matches:
+            yield base + m.start(), base + m.end(), m
+        if open_tail.match(buf, cut):
+            open_start = base + cut
+            buf = ""
+            base = pos
+        else:
+            buf = buf[cut:]
+            base += cut
+    if open_start is None and buf:
+        for m in pattern.finditer(buf):
+            yield base + m.start(), base + m.end(), m
+
+
+def iter_remove_spans(pieces, spans):
+    """断片の連結から spans（開始位置順で重ならない (開始位置, 終了位置) の列）の範囲を取り除いた結果を断片ごとに返す"""
+    spans = iter(spans)
+    span = next(spans, None)
+    pos = 0  # piece[0] の文字位置
+    for piece in pieces:
+        end = pos + len(piece)
+        out = []
+        i = pos  # 出力済み・削除済みの位置
+        while span is not None and span[0] < end:
+            start, stop = span
+            if start > i:
+                out.append(piece[i - pos:start - pos])
+            if stop > end:
+                i = end
+                break
+            i = max(i, stop)
+            span = next(spans, None)
+        if i < end:
+            out.append(piece[i - pos:])
+        pos = end
+        if out:
+            yield "".join(out)
+
+
+def iter_sub(pieces, pattern, repl, tail):
+    """pattern.sub(repl, テキスト全体) と同じ結果を断片ごとに返す（repl は関数）"""
+    carry = ""
+    for piece in pieces:
+        buf = carry + piece if carry else piece
+        matches, cut = _complete_matches(buf, pattern, tail)
+        out = []
+        prev = 0
+        for m in matches:
+            out.append(buf[prev:m.start()])
+            out.append(repl(m))
+            prev = m.end()
+        out.append(buf[prev:cut])
+        yield "".join(out)
+        carry = buf[cut:]
+    if carry:
+        yield pattern.sub(repl, carry)
+
+
+def iter_strip(pieces):
+    """テキスト全体に str.strip() をした場合と同じ結果を断片ごとに返す"""
+    started = False
+    pending = ""
+    for piece in pieces:
+        if not started:
+            piece = piece.lstrip()
+            if not piece:
+                continue
+            started = True
+        body = piece.rstrip()
+        if body:
+            yield pending + body
+            pending = piece[len(body):]
+        else:
+            # 末尾の空白は、後ろに空白以外が続いた時だけ出力する
+            pending += piece
+
+
+def iter_strip_comments(source, line_comment, block_comment_start, block_comment_end):
+    """
+    RemoveCommentsNode.strip_comments と同じ規則でコメントを削除した結果を断片ごとに返す
+
+    - 保持するのは未処理の断片と区切り文字の長さ分だけなので、メモリ使用量はファイルサイズによらない
+    - 閉じられていないブロックコメントはファイルの末尾まで読まないと判別できないため、
+      末尾まで block_comment_end が見つからなかった場合は、その開始位置から読み直して
+      ブロックコメントなしで処理し直す
+    - ブロックコメントを削除すると直前の出力とつながって区切り文字になることがあるため、
+      出力の末尾のうち区切り文字の先頭になりうる文字が続く部分は、確定するまで返さない
+    """
+    use_block = bool(block_comment_start) and bool(block_comment_end)
+    use_line = bool(line_comment)
+    block_start_len = len(block_comment_start)
+    block_end_len = len(block_comment_end)
+    line_len = len(line_comment)
+    marker_len = max(block_start_len, line_len)
+    # この長さ以上先まで読めていれば、区切り文字の判定が後続のチャンクで変わることはない
+    guard = block_start_len + line_len
+    # 出力の末尾がこれらの文字だけで続く部分は、つながった区切り文字として後から取り消す可能性がある
+    hold_chars = block_comment_start[:-1] + line_comment[:-1] if use_block else ""
+
+    NORMAL, LINE, BLOCK = 0, 1, 2
+    state = NORMAL
+    # ブロックコメントの終了後に戻る状態と、その時に出力に追加する文字列・出力から取り消す文字数
+    block_return = NORMAL
+    block_prefix = ""
+    block_drop = 0
+    # 閉じられていなかった場合に読み直す位置と、その時の状態
+    resume = 0
+    resume_state = NORMAL
+    resume_joined = False
+    # 直前でブロックコメントを削除した（直前の文字列と pos 以降がつながって区切り文字になりうる）
+    joined = False
+    # 行コメント内の、ブロックコメントを削除した後の文字列の末尾と、その中の行コメントの区切り文字の位置
+    comment = ""
+    comment_start = 0
+
+    chunks = source.chunks()
+    out = []
+    buf = ""
+    base = 0  # buf[0] のファイル内の文字位置
+    pos = 0
+    eof = False
+    # 各区切り文字の次の出現位置（buf 内、_NOT_FOUND は buf 内になし、None は未探索）
+    next_block = next_line = next_lf = None
+
+    def output_tail():
+        tail = ""
+        for piece in reversed(out):
+            tail = piece + tail
+            if len(tail) >= marker_len:
+                break
+        return tail[-marker_len:]
+
+    def drop_output(length):
+        while length:
+            piece = out.pop()
+            if len(piece) > length:
+                out.append(piece[:-length])
+                break
+            length -= len(piece)
+
+    while True:
+        need_more = False
+        n = len(buf)
+
+        if state == BLOCK:
+            end = buf.find(block_comment_end, pos)
+            if end != -1:
+                if block_prefix:
+                    out.append(block_prefix)
+                    block_prefix = ""
+                if block_drop:
+                    drop_output(block_drop)
+                    block_drop = 0
+                pos = end + block_end_len
+                state = block_return
+                joined = True
+            elif eof:
+                # 閉じられていないブロックコメント以降は、ブロックコメントとして処理しない
+                use_block = False
+                state = resume_state
+                joined = resume_joined
+                block_prefix = ""
+                block_drop = 0
+                next_block = _NOT_FOUND
+                if resume >= base:
+                    # 開始位置がまだ buf にあれば読み直す必要はない
+                    pos = resume - base
+                    continue
+                chunks.close()
+                chunks = source.chunks(resume)
+                buf = ""
+                base = resume
+                pos = 0
+                eof = False
+                next_block = next_line = next_lf = None
+                continue
+            else:
+                pos = max(pos, n - block_end_len + 1)
+                need_more = True
+
+        elif joined and not eof and n - pos < marker_len:
+            # つながった区切り文字の判定に必要な分を先に読み込む
+            need_more = True
+
+        elif state == LINE:
+            if use_block and (next_block is None or next_block < pos):
+                next_block = buf.find(block_comment_start, pos)
+                if next_block == -1:
+                    next_block = _NOT_FOUND
+            if next_lf is None or next_lf < pos:
+                next_lf = buf.find("\n", pos)
+                if next_lf == -1:
+                    next_lf = _NOT_FOUND
+
+            # 行コメント内でブロックコメントを削除した結果、ブロックコメントの開始ができた場合
+            joined_block = 0
+            if joined and use_block:
+                joined_block = joined_marker_length(comment, buf, pos, block_comment_start)
+            joined = False
+
+            if joined_block or (use_block and next_block < next_lf):
+                resume = base + pos if joined_block else base + next_block
+                resume_state = LINE
+                resume_joined = False
+                block_return = LINE
+                if joined_block:
+                    start = pos - joined_block
+                    offset = len(comment) - joined_block - comment_start
+                    comment = comment[:-joined_block]
+                    if offset < line_len:
+                        # 行コメントの区切り文字にかかる場合はブロックコメントが優先され、行コメントではなくなる
+                        block_return = NORMAL
+                        if offset >= 0:
+                            block_prefix = line_comment[:offset]
+                        else:
+                            block_drop = -offset
+                else:
+                    start = next_block
+                    comment += buf[pos:next_block]
+                state = BLOCK
+                pos = start + block_start_len
+            elif next_lf != _NOT_FOUND:
+                # 改行自体は残す
+                pos = next_lf
+                state = NORMAL
+            elif eof:
+                yield "".join(out)
+                return
+            else:
+                skip = max(pos, n - block_start_len + 1) if use_block else n
+                comment += buf[pos:skip]
+                pos = skip
+                need_more = True
+            if len(comment) > marker_len:
+                comment_start -= len(comment) - marker_len
+                comment = comment[-marker_len:]
+
+        else:
+            if use_block and (next_block is None or next_block < pos):
+                next_block = buf.find(block_comment_start, pos)
+                if next_block == -1:
+                    next_block = _NOT_FOUND
+            if use_line and (next_line is None or next_line < pos):
+                next_line = buf.find(line_comment, pos)
+                if next_line == -1:
+                    next_line = _NOT_FOUND
+            block_at = next_block if use_block else _NOT_FOUND
+            line_at = next_line if use_line else _NOT_FOUND
+            # 出力の末尾とつながってできた区切り文字は pos より前から始まる
+            joined_block = joined_line = 0
+            if joined:
+                tail = output_tail()
+                if use_block:
+                    joined_block = joined_marker_length(tail, buf, pos, block_comment_start)
+                    if joined_block:
+                        block_at = pos - joined_block
+                if use_line:
+                    joined_line = joined_marker_length(tail, buf, pos, line_comment)
+                    if joined_line:
+                        line_at = pos - joined_line
+                joined = bool(joined_block or joined_line)
+            first = min(block_at, line_at)
+            limit = n if eof else n - guard
+
+            if first == _NOT_FOUND or first >= limit:
+                if eof:
+                    if pos < n:
+                        out.append(buf[pos:])
+                    yield "".join(out)
+                    return
+                if limit > pos:
+                    out.append(buf[pos:limit])
+                    pos = limit
+                need_more = True
+            elif block_at < line_at + line_len:
+                resume_state = NORMAL
+                resume_joined = joined
+                block_return = NORMAL
+                if joined_block:
+                    block_drop = joined_block
+                    resume = base + pos
+                elif joined:
+                    # 閉じられていなかった場合は、つながった行コメントの判定から処理し直す
+                    block_prefix = buf[pos:block_at]
+                    resume = base + pos
+                else:
+                    # 閉じられていなかった場合は、行コメントの判定も含めて first から処理し直す
+                    if first > pos:
+                        out.append(buf[pos:first])
+                    # 行コメントと重なっている部分（first からブロックコメントの開始まで）は閉じられた時だけ出力する
+                    block_prefix = buf[first:block_at]
+                    resume = base + first
+                state = BLOCK
+                pos = block_at + block_start_len
+            else:
+                if joined_line:
+                    drop_output(joined_line)
+                elif line_at > pos:
+                    out.append(buf[pos:line_at])
+                pos = line_at + line_len
+                state = LINE
+                joined = False
+                # 行コメントの区切り文字と直前の出力（行コメント内でできたブロックコメントの開始の判定に使う）
+                comment = output_tail() + line_comment
+                comment_start = len(comment) - line_len
+
+        if need_more:
+            # 出力はチャンクを読み込むごとにまとめて返す（取り消す可能性のある末尾は残す）
+            if out:
+                text = "".join(out)
+                cut = len(text.rstrip(hold_chars)) if hold_chars else len(text)
+                if cut > 0:
+                    yield text[:cut]
+                    out = [text[cut:]]
+                else:
+                    out = [text]
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+            else:
+                buf = buf[pos:] + chunk
+                base += pos
+                # 見つかっている位置は buf の切り詰めに合わせてずらし、見つかっていないものは探し直す
+                next_block = None if next_block in (None, _NOT_FOUND) else next_block - pos
+                next_line = None if next_line in (None, _NOT_FOUND) else next_line - pos
+                next_lf = None if next_lf in (None, _NOT_FOUND) else next_lf - pos
+                pos = 0
@@ -0,0 +1,127 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+
+def find_wildcard_directories(impact_wildcards):
+    """
+    Impact Pack がワイルドカードを読み込むディレクトリを推定する
+    - <Impact Pack>/wildcards
+    - <Impact Pack>/custom_wildcards（または impact.config の custom_wildcards）
+    """
+    dirs = []
+    module_file = getattr(impact_wildcards, '__file__', None)
+    if module_file:
+        # <Impact Pack>/modules/impact/wildcards.py
+        impact_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(module_file))))
+        dirs.append(os.path.join(impact_root, 'wildcards'))
+        dirs.append(os.path.join(impact_root, 'custom_wildcards'))
+    try:
+        import impact.config
+        custom = impact.config.get_config().get('custom_wildcards')
+        if custom:
+            dirs.append(os.path.abspath(custom))
+    except Exception:
+        pass
+    return list(dict.fromkeys(dirs))
+
+
+def directory_fingerprint(dirs):
+    """ディレクトリ配下のファイル数・合計サイズ・最新の mtime_ns"""
+    result = []
+    for d in dirs:
+        count, total_size, latest = 0, 0, 0
+        for root, _, files in os.walk(d):
+            for name in files:
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                count += 1
+                total_size += st.st_size
+                latest = max(latest, st.st_mtime_ns)
+        result.append((d, count, total_size, latest))
+    return tuple(result)
+
+
+class WildcardResultCache:
+    """
+    ワイルドカード展開結果の LRU キャッシュ
+
+    キーは (テキスト, seed)。ワイルドカードディレクトリのフィンガープリントが変わったら
+    （ファイルの追加・削除・更新）キャッシュ全体を破棄する。
+    フィンガープリントの再計算は FINGERPRINT_TTL 秒に1回まで。
+    """
+
+    FINGERPRINT_TTL = 1.0
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._dirs = None
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_directories(self, dirs):
+        with self._lock:
+            self._dirs = list(dirs)
+            self._fingerprint = None
+            self._checked_at = 0.0
+            self._entries.clear()
+
+    def _validate(self):
+        """ワイルドカードファイルが変わっていればキャッシュを破棄する（ロック取得済みで呼ぶ）"""
+        now = time.monotonic()
+        if self._dirs is None or now - self._checked_at < self.FINGERPRINT_TTL:
+            return
+        self._checked_at = now
+        fingerprint = directory_fingerprint(self._dirs)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._entries.clear()
+
+    def process(self, text, seed, process):
+        """process(text, seed) の結果をキャッシュ経由で返す"""
+        key = (text, seed)
+        with self._lock:
+            self._validate()
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = process(text, seed)
+
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return result
+
+    def cache_info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "directories": list(self._dirs or []),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# ProcessWildcardNode などで共有するキャッシュ
+wildcard_result_cache = WildcardResultCache()